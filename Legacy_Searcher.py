@@ -1,314 +1,293 @@
 import streamlit as st
-import requests
-from bs4 import BeautifulSoup
-import re
 import os
-import zipfile
-from io import BytesIO
 import logging
+import sqlite3
+import time
+from functools import partial
+
+from legacy_backends import (
+    INDEXED_ROOTS, RESULT_CACHE_TTL, SEARCH_SOURCES, build_search_outcome, create_batch_zip, create_zip,
+    create_zip_from_urls, format_size, get_drawing_index, get_result_cache, parse_code_list,
+    read_codes_from_upload, read_file_bytes, resolve_drawing_codes, search_all_sources
+)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Função para formatar o código de desenho para a pasta Desativados
-def format_drawing_code_desativados(drawing_code):
-    parts = drawing_code.split('-')
-    formatted_parts = [parts[0].zfill(3)] + parts[1:]
-    return '-'.join(formatted_parts)
-
-# Função para formatar o código de desenho para a pasta FMC (sem formatação)
-def format_drawing_code_fmc(drawing_code):
-    return drawing_code
-
-# Busca na web
-def get_latest_drawing_urls(base_url, drawing_code):
-    drawing_code = format_drawing_code_desativados(drawing_code)
-    parts = drawing_code.split('-')
-    if len(parts) != 3:
-        raise ValueError("Formato inválido. Use: 'xxx-xxx-xxx'")
-
-    try:
-        response = requests.get(base_url, timeout=10)
-        if response.status_code != 200:
-            raise Exception(f"Erro ao acessar a pasta raiz: {base_url}")
-        soup = BeautifulSoup(response.content, 'html.parser')
-
-        first_level_pattern = re.compile(f"^{parts[0]}\\b.*")
-        first_level_folder = next((link['href'] for link in soup.find_all('a', href=True)
-                                   if first_level_pattern.match(link.text.strip('/'))), None)
-        if not first_level_folder:
-            raise Exception(f"Nenhuma pasta encontrada para o prefixo: {parts[0]}")
-        first_level_url = base_url.rstrip('/') + '/' + first_level_folder
-
-        response = requests.get(first_level_url, timeout=10)
-        if response.status_code != 200:
-            raise Exception(f"Erro ao acessar a subpasta: {first_level_url}")
-        soup = BeautifulSoup(response.content, 'html.parser')
-        second_level_pattern = re.compile(f"^{parts[0]}-{parts[1]}\\b.*")
-        second_level_folder = next((link['href'] for link in soup.find_all('a', href=True)
-                                    if second_level_pattern.match(link.text.strip('/'))), None)
-        if not second_level_folder:
-            raise Exception(f"Nenhuma subpasta encontrada para: {parts[0]}-{parts[1]}")
-        second_level_url = first_level_url.rstrip('/') + '/' + second_level_folder
-
-        response = requests.get(second_level_url, timeout=10)
-        if response.status_code != 200:
-            raise Exception(f"Erro ao acessar a subpasta final: {second_level_url}")
-        soup = BeautifulSoup(response.content, 'html.parser')
-
-        file_pattern = re.compile(f"^{drawing_code}(?:-\\d+)?(?:-[A-Z])?\\.tif$")
-        file_links = [link['href'] for link in soup.find_all('a', href=True) if file_pattern.match(link['href'])]
-
-        if not file_links:
-            raise Exception(f"Nenhum arquivo encontrado para: {drawing_code}")
-
-        grouped = {}
-        for file in file_links:
-            match = re.search(rf"{drawing_code}(?:-(\\d+))?(?:-([A-Z]))?\\.tif$", file)
-            revision = match.group(2) if match and match.group(2) else ''
-            if revision not in grouped:
-                grouped[revision] = []
-            grouped[revision].append(second_level_url.rstrip('/') + '/' + file)
-
-        latest_revision = sorted(grouped.keys(), reverse=True)[0]
-        return grouped[latest_revision], latest_revision
-
-    except requests.RequestException as e:
-        raise Exception(f"Erro de rede: {str(e)}")
-    except Exception as e:
-        raise Exception(f"Erro na busca web: {str(e)}")
-
-def get_latest_drawing_paths(base_path, drawing_code, format_code_func):
-    drawing_code = format_code_func(drawing_code)
-    parts = drawing_code.split('-')
-    if len(parts) < 2:
-        raise ValueError("Formato inválido. Use: 'xxx-xxx' ou 'xxx-xxx-xxx'")
-
-    if not os.path.exists(base_path):
-        raise Exception(f"Caminho não acessível: {base_path}")
-
-    file_pattern = re.compile(
-        rf"^{re.escape(drawing_code)}(?:-\d+)?(?:-[A-Z])?\.tif$", re.IGNORECASE
+# ZIP já montado e guardado na sessão: o download_button só o lê quando o usuário clica,
+# em vez de copiar o arquivo inteiro para a memória a cada reexecução
+def rewind_and_return(file):
+    file.seek(0)
+    return file
+
+# Exibe o resultado de uma fonte só com metadados; os bytes (arquivo ou ZIP) só são
+# lidos ou baixados quando o usuário clica
+def render_search_outcome(drawing_code, outcome):
+    source_name = outcome["source"]
+    if outcome["status"] == "cancelled":
+        st.info(f"⏹️ {source_name}: {outcome['message']}")
+        return
+    if outcome["status"] == "error":
+        st.warning(f"⚠️ {source_name}: {outcome['message']}")
+        return
+    if outcome["status"] == "empty":
+        st.info(f"🔍 {source_name}: {outcome['message']}")
+        return
+
+    files = outcome["files"]
+    revision = outcome["revision"]
+    is_web = source_name == "Web"
+    st.success(f"✅ {source_name} - {'Revisão' if is_web else 'Versão'} mais recente: {revision}")
+    st.dataframe(
+        [{"Arquivo": f["name"], "Tamanho": format_size(f["size"]), "Página": f["page"], "Revisão": f["revision"]}
+         for f in files],
+        use_container_width=True,
+        hide_index=True
     )
 
-    found_files = []
-    searched_dirs = []
-
-    try:
-        for root, dirs, files in os.walk(base_path):
-            searched_dirs.append(root)
-            for file in files:
-                if file_pattern.fullmatch(file):
-                    found_files.append(os.path.join(root, file))
-
-        logger.info(f"Pesquisados {len(searched_dirs)} diretórios para padrão: {file_pattern.pattern}")
-        logger.info(f"Encontrados {len(found_files)} arquivos correspondentes")
-
-    except PermissionError as e:
-        raise Exception(f"Permissão negada para acessar: {base_path} - {str(e)}")
-    except Exception as e:
-        raise Exception(f"Erro ao pesquisar arquivos locais em {base_path}: {str(e)}")
-
-    return found_files
-
-def group_files_by_version_and_page(files):
-    grouped_files = {}
-    for file in files:
-        filename = os.path.basename(file)
-        match = re.search(r'-(\d+)?-?([A-Z])?\.', filename)
-        page = match.group(1) if match and match.group(1) else 'single'
-        version = match.group(2) if match and match.group(2) else ''
-        if version not in grouped_files:
-            grouped_files[version] = {}
-        if page not in grouped_files[version]:
-            grouped_files[version][page] = []
-        grouped_files[version][page].append(file)
-    return grouped_files
-
-def create_zip(files):
-    buffer = BytesIO()
-    try:
-        with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-            for file_path in files:
-                if os.path.exists(file_path):
-                    zip_file.write(file_path, os.path.basename(file_path))
-    except Exception as e:
-        raise Exception(f"Erro ao criar arquivo ZIP: {str(e)}")
-    buffer.seek(0)
-    return buffer
-
-def create_zip_from_urls(urls):
-    buffer = BytesIO()
-    try:
-        with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-            for url in urls:
-                try:
-                    response = requests.get(url, timeout=30)
-                    response.raise_for_status()
-                    filename = url.split('/')[-1]
-                    zip_file.writestr(filename, response.content)
-                except requests.RequestException as e:
-                    logger.warning(f"Falha ao baixar {url}: {str(e)}")
-                    continue
-    except Exception as e:
-        raise Exception(f"Erro ao criar ZIP a partir de URLs: {str(e)}")
-    buffer.seek(0)
-    return buffer
+    for f in files:
+        if is_web:
+            st.markdown(f"🔗 [{f['name']}]({f['location']})")
+        else:
+            st.download_button(
+                label=f"📥 Baixar {f['name']}",
+                data=partial(read_file_bytes, f["location"]),
+                file_name=f["name"],
+                key=f"{source_name}_{f['location']}",
+                on_click="ignore"
+            )
+
+    if len(files) < 2:
+        return
+    locations = [f["location"] for f in files]
+    if not is_web:
+        st.download_button(
+            label=f"📦 Baixar todas as páginas ({source_name}) - Versão {revision}",
+            data=partial(create_zip, locations),
+            file_name=f"{drawing_code}-versao-{revision}.zip",
+            key=f"{source_name}_zip",
+            on_click="ignore"
+        )
+        return
+
+    # O ZIP da web é montado na execução do script para mostrar o progresso dos downloads
+    zip_key = f"web_zip_{drawing_code}_{revision}"
+    prepared_zips = st.session_state.setdefault("prepared_zips", {})
+    if zip_key in prepared_zips:
+        st.download_button(
+            label=f"📦 Baixar todas as páginas (Web) - Revisão {revision}",
+            data=partial(rewind_and_return, prepared_zips[zip_key]),
+            file_name=f"{drawing_code}-web-{revision}.zip",
+            key=zip_key,
+            on_click="ignore"
+        )
+    elif st.button(f"📦 Preparar ZIP com todas as páginas (Web) - Revisão {revision}", key=f"prepare_{zip_key}"):
+        download_progress = st.progress(0, text="📦 Baixando páginas para o ZIP...")
 
-# Streamlit UI
-st.set_page_config(page_title="🔍 Localizador de Desenhos Técnicos Legacy", layout="centered")
-st.title("🔍 Localizador de Desenhos Técnicos Legacy")
+        def show_download_progress(done, total):
+            download_progress.progress(done / total, text=f"📦 Páginas baixadas: {done}/{total}")
 
-if "drawing_code" not in st.session_state:
-    st.session_state.drawing_code = ""
+        prepared_zips[zip_key] = create_zip_from_urls(locations, show_download_progress)
+        st.rerun()
 
-if "stop_search" not in st.session_state:
-    st.session_state.stop_search = False
+def clear_search_results():
+    st.session_state.pop("search_results", None)
+    st.session_state.pop("prepared_zips", None)
 
-if "history" not in st.session_state:
-    st.session_state.history = []
+# Tela da busca em lote
+def render_batch_mode():
+    st.subheader("📋 Busca em lote")
+    if "batch_results" not in st.session_state:
+        st.session_state.batch_results = []
 
-user_input = st.text_input("Digite o código do desenho (ex: 180-570-542):", value=st.session_state.drawing_code)
-debug_mode = st.checkbox("🐛 Ativar Modo Debug", help="Mostrar informações detalhadas da busca")
+    pasted = st.text_area("Cole a lista de códigos (um por linha, ou separados por vírgula/espaço):", height=150)
+    uploaded = st.file_uploader("...ou envie um arquivo CSV/XLSX com os códigos", type=["csv", "txt", "xlsx"])
 
-col1, col2, col3 = st.columns([1, 1, 1])
+    codes = parse_code_list(pasted)
+    if uploaded is not None:
+        try:
+            codes = list(dict.fromkeys(codes + read_codes_from_upload(uploaded.name, uploaded.getvalue())))
+        except Exception as e:
+            st.error(f"❌ {e}")
+    st.caption(f"{len(codes)} código(s) reconhecido(s)")
+
+    col1, col2 = st.columns([1, 1])
+    with col1:
+        start = st.button("Resolver lote", use_container_width=True, disabled=not codes)
+    with col2:
+        if st.button("Parar busca", key="batch_stop", use_container_width=True):
+            st.info("⏹️ Busca em lote interrompida")
+
+    if start:
+        progress_bar = st.progress(0)
+        status_text = st.empty()
+        results = []
+        started = time.time()
+        st.session_state.pop("batch_zip", None)
+
+        def show_progress(done, total):
+            progress_bar.progress(int(done / total * 100))
+            status_text.text(f"⏳ {done}/{total} códigos resolvidos ({time.time() - started:.0f}s)")
+
+        for done, (code, rows) in enumerate(resolve_drawing_codes(codes, on_wait=show_progress), 1):
+            results.extend(rows)
+            show_progress(done, len(codes))
+        order = {code: position for position, code in enumerate(codes)}
+        results.sort(key=lambda row: order[row["Código"]])
+        st.session_state.batch_results = results
+        status_text.text(f"✅ {len(codes)} códigos resolvidos em {time.time() - started:.1f}s")
+
+    results = st.session_state.batch_results
+    if results:
+        found = {row["Código"] for row in results if row["Arquivos"]}
+        st.success(f"✅ {len(found)} de {len({row['Código'] for row in results})} códigos encontrados")
+        table = [dict(row, Arquivos="\n".join(row["Arquivos"])) for row in results]
+        st.dataframe(table, use_container_width=True)
+
+        if st.button("📦 Gerar ZIP combinado", disabled=not found):
+            with st.spinner("Montando ZIP com todos os arquivos..."):
+                st.session_state.batch_zip = create_batch_zip(results)
+        if st.session_state.get("batch_zip"):
+            st.download_button(
+                label="📥 Baixar ZIP do lote",
+                data=partial(rewind_and_return, st.session_state.batch_zip),
+                file_name=f"lote-{time.strftime('%Y%m%d-%H%M')}.zip"
+            )
 
-with col1:
-    if st.button("Buscar desenho", use_container_width=True):
-        if user_input:
-            st.session_state.drawing_code = user_input
-            st.session_state.stop_search = False
-            if not st.session_state.history or st.session_state.history[0] != user_input:
-                if user_input not in st.session_state.history:
-                    st.session_state.history.insert(0, user_input)
-                    if len(st.session_state.history) > 10:
-                        st.session_state.history = st.session_state.history[:10]
-            st.rerun()
+# Streamlit UI
+def main():
+    st.set_page_config(page_title="🔍 Localizador de Desenhos Técnicos Legacy", layout="centered")
+    st.title("🔍 Localizador de Desenhos Técnicos Legacy")
 
-with col2:
-    if st.button("Limpar", use_container_width=True):
+    with st.sidebar:
+        st.subheader("🗂️ Índice da rede local")
+        try:
+            drawing_index = get_drawing_index()
+            for root in INDEXED_ROOTS:
+                refreshed_at = drawing_index.status(root)
+                if refreshed_at is None:
+                    st.caption(f"{root}: não indexado (busca pela pasta)")
+                else:
+                    situation = "atualizado" if drawing_index.is_fresh(root) else "desatualizado"
+                    st.caption(f"{root}: {situation} em {time.strftime('%d/%m/%Y %H:%M', time.localtime(refreshed_at))}")
+            if st.button("🔄 Atualizar índice", use_container_width=True):
+                for root in INDEXED_ROOTS:
+                    if os.path.exists(root):
+                        drawing_index.refresh_in_background(root)
+                st.info("Atualização do índice iniciada em segundo plano")
+        except (sqlite3.Error, OSError) as e:
+            st.caption(f"⚠️ Índice indisponível: {e}")
+
+        st.subheader("🧠 Cache de resultados")
+        result_cache = get_result_cache()
+        st.caption(f"{len(result_cache)} resultado(s) guardado(s), válidos por {RESULT_CACHE_TTL // 3600}h")
+        if st.button("🧹 Limpar cache de resultados", use_container_width=True):
+            result_cache.invalidate()
+            clear_search_results()
+            st.info("Cache de resultados limpo")
+
+        mode = st.radio("Modo de busca", ["Desenho único", "Lote"], horizontal=True)
+
+    if mode == "Lote":
+        render_batch_mode()
+        return
+
+    if "drawing_code" not in st.session_state:
         st.session_state.drawing_code = ""
+
+    if "stop_search" not in st.session_state:
         st.session_state.stop_search = False
-        st.rerun()
 
-with col3:
-    if st.button("Parar busca", use_container_width=True):
-        st.session_state.stop_search = True
-
-# Histórico de buscas
-if st.session_state.history:
-    with st.expander("📜 Histórico de buscas recentes"):
-        for item in st.session_state.history:
-            cols = st.columns([0.8, 0.2])
-            with cols[0]:
-                if st.button(f"🔄 Buscar novamente: {item}", key=f"hist_{item}"):
-                    st.session_state.drawing_code = item
-                    st.session_state.stop_search = False
-                    st.rerun()
-            with cols[1]:
-                if st.button("🗑️", key=f"del_{item}"):
-                    st.session_state.history.remove(item)
-                    st.rerun()
-
-# Continuação da lógica de busca
-if st.session_state.drawing_code and not st.session_state.stop_search:
-    drawing_code = st.session_state.drawing_code
-    st.subheader(f"🔎 Resultados para: {drawing_code}")
-    progress_bar = st.progress(0)
-    status_text = st.empty()
-
-    try:
-        status_text.text("🌐 Buscando na web...")
-        progress_bar.progress(25)
-        urls, latest_revision = get_latest_drawing_urls(
-            "http://rio1web.net.fmcti.com/ipd/fmc_released_legacy/Desenhos/Produtos",
-            drawing_code
-        )
-        if urls:
-            st.success(f"✅ Web - Revisão mais recente: {latest_revision}")
-            for url in urls:
-                st.write(url)
-            if len(urls) > 1:
-                zip_buffer = create_zip_from_urls(urls)
-                st.download_button(
-                    label=f"📦 Baixar todas as páginas (Web) - Revisão {latest_revision}",
-                    data=zip_buffer,
-                    file_name=f"{drawing_code}-web-{latest_revision}.zip"
-                )
-            progress_bar.progress(100)
-            status_text.text("✅ Busca concluída com sucesso!")
-    except Exception as e:
-        st.warning(f"⚠️ Web: {e}")
-        progress_bar.progress(33)
-
-    if not st.session_state.stop_search:
-        try:
-            status_text.text("📁 Buscando na rede local (Desativados)...")
-            progress_bar.progress(50)
-            path = r"\\rio-data-srv\arquivo\Desativados"
-            files = get_latest_drawing_paths(path, drawing_code, format_drawing_code_desativados)
-            if files:
-                grouped = group_files_by_version_and_page(files)
-                latest = sorted(grouped.keys(), reverse=True)[0]
-                st.success(f"✅ Desativados - Versão mais recente: {latest}")
-                for page, group in grouped[latest].items():
-                    for file_path in group:
-                        with open(file_path, "rb") as file:
-                            st.download_button(
-                                label=f"📥 Baixar {os.path.basename(file_path)}",
-                                data=file,
-                                file_name=os.path.basename(file_path)
-                            )
-                    if len(group) > 1:
-                        zip_buffer = create_zip(group)
-                        st.download_button(
-                            label=f"📦 Baixar todas as páginas - Página {page} - Versão {latest}",
-                            data=zip_buffer,
-                            file_name=f"{drawing_code}-versao-{latest}.zip"
-                        )
-                progress_bar.progress(100)
-                status_text.text("✅ Busca concluída com sucesso!")
-                st.session_state.stop_search = True
-            else:
-                progress_bar.progress(66)
-        except Exception as e:
-            st.warning(f"⚠️ Desativados: {e}")
-            progress_bar.progress(66)
+    if "history" not in st.session_state:
+        st.session_state.history = []
+
+    user_input = st.text_input("Digite o código do desenho (ex: 180-570-542):", value=st.session_state.drawing_code)
+    debug_mode = st.checkbox("🐛 Ativar Modo Debug", help="Mostrar informações detalhadas da busca")
+
+    col1, col2, col3 = st.columns([1, 1, 1])
+
+    with col1:
+        if st.button("Buscar desenho", use_container_width=True):
+            if user_input:
+                st.session_state.drawing_code = user_input
+                st.session_state.stop_search = False
+                clear_search_results()
+                if not st.session_state.history or st.session_state.history[0] != user_input:
+                    if user_input not in st.session_state.history:
+                        st.session_state.history.insert(0, user_input)
+                        if len(st.session_state.history) > 10:
+                            st.session_state.history = st.session_state.history[:10]
+                st.rerun()
+
+    with col2:
+        if st.button("Limpar", use_container_width=True):
+            st.session_state.drawing_code = ""
+            st.session_state.stop_search = False
+            clear_search_results()
+            st.rerun()
 
-    if not st.session_state.stop_search:
-        try:
-            status_text.text("📁 Buscando na rede local (FMC)...")
-            progress_bar.progress(75)
-            path = r"\\rio-data-srv\arquivo\FMC"
-            files = get_latest_drawing_paths(path, drawing_code, format_drawing_code_fmc)
-            if files:
-                grouped = group_files_by_version_and_page(files)
-                latest = sorted(grouped.keys(), reverse=True)[0]
-                st.success(f"✅ FMC - Versão mais recente: {latest}")
-                for page, group in grouped[latest].items():
-                    for file_path in group:
-                        with open(file_path, "rb") as file:
-                            st.download_button(
-                                label=f"📥 Baixar {os.path.basename(file_path)}",
-                                data=file,
-                                file_name=os.path.basename(file_path)
-                            )
-                    if len(group) > 1:
-                        zip_buffer = create_zip(group)
-                        st.download_button(
-                            label=f"📦 Baixar todas as páginas - Página {page} - Versão {latest}",
-                            data=zip_buffer,
-                            file_name=f"{drawing_code}-versao-{latest}.zip"
-                        )
-                progress_bar.progress(100)
-                status_text.text("✅ Busca concluída com sucesso!")
-                st.session_state.stop_search = True
-            else:
-                progress_bar.progress(100)
-                status_text.text("❌ Nenhum arquivo encontrado em nenhum local")
-        except Exception as e:
-            st.warning(f"⚠️ FMC: {e}")
-            progress_bar.progress(100)
-            status_text.text("❌ Todas as fontes de busca esgotadas")
+    with col3:
+        if st.button("Parar busca", use_container_width=True):
+            st.session_state.stop_search = True
+
+    # Histórico de buscas
+    if st.session_state.history:
+        with st.expander("📜 Histórico de buscas recentes"):
+            for item in st.session_state.history:
+                cols = st.columns([0.8, 0.2])
+                with cols[0]:
+                    if st.button(f"🔄 Buscar novamente: {item}", key=f"hist_{item}"):
+                        st.session_state.drawing_code = item
+                        st.session_state.stop_search = False
+                        clear_search_results()
+                        st.rerun()
+                with cols[1]:
+                    if st.button("🗑️", key=f"del_{item}"):
+                        st.session_state.history.remove(item)
+                        st.rerun()
+
+    # Continuação da lógica de busca
+    drawing_code = st.session_state.drawing_code
+    saved = st.session_state.get("search_results")
+    if drawing_code and saved and saved["code"] == drawing_code:
+        st.subheader(f"🔎 Resultados para: {drawing_code}")
+        for outcome in saved["outcomes"]:
+            render_search_outcome(drawing_code, outcome)
+    elif drawing_code and not st.session_state.stop_search:
+        st.subheader(f"🔎 Resultados para: {drawing_code}")
+        progress_bar = st.progress(0)
+        status_text = st.empty()
+        containers = {source["name"]: st.container() for source in SEARCH_SOURCES}
+        started = time.time()
+        outcomes = []
+
+        def show_pending(names):
+            status_text.text(f"⏳ Buscando em: {', '.join(names)} ({time.time() - started:.0f}s)")
+
+        status_text.text("⏳ Buscando na web e na rede local (Desativados, FMC)...")
+        for count, (source, result, error) in enumerate(search_all_sources(drawing_code, on_wait=show_pending), 1):
+            progress_bar.progress(int(count / len(SEARCH_SOURCES) * 100))
+            outcome = build_search_outcome(source, result, error)
+            outcomes.append(outcome)
+            with containers[source["name"]]:
+                render_search_outcome(drawing_code, outcome)
+
+        source_order = [source["name"] for source in SEARCH_SOURCES]
+        outcomes.sort(key=lambda outcome: source_order.index(outcome["source"]))
+        st.session_state.search_results = {"code": drawing_code, "outcomes": outcomes}
+        progress_bar.progress(100)
+        if any(outcome["status"] == "found" for outcome in outcomes):
+            status_text.text(f"✅ Busca concluída com sucesso! ({time.time() - started:.1f}s)")
+        else:
+            status_text.text("❌ Nenhum arquivo encontrado em nenhum local")
+
+    if drawing_code and st.session_state.get("search_results", {}).get("code") == drawing_code:
+        if st.button("♻️ Buscar de novo sem usar o cache", key="refresh_results"):
+            get_result_cache().invalidate(drawing_code)
+            st.session_state.stop_search = False
+            clear_search_results()
+            st.rerun()
 
+if __name__ == "__main__":
+    main()
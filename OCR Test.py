@@ -1,11 +1,14 @@
-import gradio as gr
 import pytesseract
-from PIL import Image, ImageDraw
+from PIL import ImageDraw
 import fitz  # PyMuPDF
-import io
 import os
 import re
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import time
+import unicodedata
+from collections import defaultdict
+from ocr_cache import OCRCache, file_hash
+from ocr_engine import engine_name
+from pdf_ocr import ADAPTIVE_OCR, DPI, native_page_words, ocr_pages, render_page
 
 # Caminho do Tesseract
 tesseract_path = os.path.join(os.path.dirname(__file__), "tesseract", "tesseract.exe")
@@ -14,107 +17,345 @@ pytesseract.pytesseract.tesseract_cmd = tesseract_path
 # Configurações visuais
 PADDING = 4
 BORDER_WIDTH = 4
-DPI = 100  # Qualidade da renderização do PDF
+THUMBNAIL_WIDTH = 640  # Largura máxima das páginas exibidas na galeria
+# Configurações que alteram o resultado do OCR (entram na chave do cache)
+# As caixas das palavras ficam em pontos do PDF (1/72"), independentes do DPI de renderização
+OCR_SETTINGS = {
+    "engine": engine_name(),
+    "dpi": "adaptativo" if ADAPTIVE_OCR else DPI,
+    "lang": "padrão",
+    "config": "",
+    "coords": "pt",
+}
+# Páginas com menos palavras que isso na camada de texto são tratadas como digitalizadas
+MIN_NATIVE_WORDS = 3
+# Como cada página foi lida, para o relatório de status
+METHOD_LABELS = {"texto": "texto do PDF", "ocr": "OCR", "cache": "OCR em cache"}
+
+# Aberto na primeira indexação: no Windows os processos do pool importam este script
+# de novo, e nada pesado (gradio, cache) pode rodar no import
+_ocr_cache = False  # False: ainda não aberto; None: desativado
+
+def get_ocr_cache():
+    global _ocr_cache
+    if _ocr_cache is False:
+        try:
+            _ocr_cache = OCRCache()
+        except Exception as e:
+            print(f"Cache de OCR desativado: {e}")
+            _ocr_cache = None
+    return _ocr_cache
+
+def normalize_word(word):
+    """Minúsculas e sem acentos, para 'Rescisão' e 'rescisao' caírem na mesma entrada do índice"""
+    text = unicodedata.normalize("NFKD", word.casefold())
+    return "".join(c for c in text if not unicodedata.combining(c))
 
 def normalize_search_term(term_raw):
     keywords = re.split(r"[ /]+", term_raw.strip())
-    keywords = [re.escape(k) for k in keywords if k]
-    if not keywords:
-        return r"$^", []
-    return r"(" + "|".join(keywords) + r")", keywords
+    return [normalize_word(k) for k in keywords if k]
+
+def ocr_cache_key(doc_digest, page_index):
+    # O cache é indexado pelo hash do PDF + número da página, então o mesmo arquivo
+    # enviado de novo não passa pelo Tesseract
+    return OCRCache.make_key(f"{doc_digest}:{page_index}", OCR_SETTINGS)
+
+class DocumentIndex:
+    """Índice invertido das palavras do PDF: palavra normalizada -> [(página, caixa)]
+
+    O OCR roda uma vez, quando o arquivo é enviado; cada busca depois disso é só
+    consulta ao índice e desenho dos destaques nas páginas encontradas.
+    """
+
+    def __init__(self, file_path, page_count):
+        self.file_path = file_path
+        self.page_count = page_count
+        self.word_count = 0
+        self.postings = defaultdict(list)
+        self.page_methods = {}
+        # Tempo e pixels do OCR de cada página lida pelo Tesseract
+        self.page_stats = {}
+        # Falso enquanto a indexação não termina (ou se foi interrompida)
+        self.complete = False
+        # Verdadeiro enquanto alguém ainda lê páginas para este índice; uma busca
+        # feita nesse meio-tempo acompanha as páginas que forem chegando
+        self.indexing = False
+
+    def add_page(self, page_index, words, method):
+        for text, x, y, w, h, _ in words:
+            self.postings[normalize_word(text)].append((page_index, (x, y, w, h)))
+        self.word_count += len(words)
+        self.page_methods[page_index] = method
+
+    def describe_methods(self):
+        """Resumo de quantas páginas foram lidas por cada caminho, ex.: '10 por texto do PDF, 2 por OCR'"""
+        counts = defaultdict(int)
+        for method in self.page_methods.values():
+            counts[method] += 1
+        return ", ".join(f"{counts[m]} por {label}" for m, label in METHOD_LABELS.items() if counts[m])
+
+    def describe_ocr_work(self):
+        """Resumo do OCR feito, ex.: 'OCR: 12.3 s, 4.1 Mpx (45% menos que páginas inteiras a 100 DPI)'"""
+        if not self.page_stats:
+            return ""
+        seconds = sum(stats["seconds"] for stats in self.page_stats.values())
+        pixels = sum(stats["pixels"] for stats in self.page_stats.values())
+        full = sum(stats["page_pixels"] for stats in self.page_stats.values())
+        saved = 1 - pixels / full if full else 0
+        comparison = f"{saved:.0%} menos" if saved >= 0 else f"{-saved:.0%} mais"
+        return f"OCR: {seconds:.1f} s, {pixels / 1e6:.1f} Mpx ({comparison} que páginas inteiras a {DPI} DPI)"
+
+    def page_report(self):
+        """Uma linha por página lida pelo Tesseract: tempo e pixels economizados (negativo: letra miúda pediu mais DPI)"""
+        return "\n".join(
+            f"Página {page_index + 1}: {stats['seconds']:.2f} s, {stats['pixels']:,} px "
+            f"({stats['page_pixels'] - stats['pixels']:,} economizados frente a {stats['page_pixels']:,} a {DPI} DPI)"
+            for page_index, stats in sorted(self.page_stats.items())
+        )
+
+    @property
+    def progress_text(self):
+        return f"{len(self.page_methods)}/{self.page_count}"
+
+    def search(self, keywords):
+        """Retorna {página: [caixas]} das palavras que contêm algum dos termos"""
+        hits = defaultdict(list)
+        for keyword in keywords:
+            # Trechos de palavra também contam ("contrat" acha "contratante"), mas a
+            # varredura é só no vocabulário, não em todas as palavras do documento
+            # Cópia das entradas: a indexação pode estar acrescentando palavras em outra thread
+            for word, occurrences in list(self.postings.items()):
+                if keyword in word:
+                    for page_index, box in occurrences:
+                        hits[page_index].append(box)
+        return dict(sorted(hits.items()))
+
+def match_boxes(words, keywords):
+    """Caixas das palavras de uma página que contêm algum dos termos (busca durante a indexação)"""
+    return [(x, y, w, h) for text, x, y, w, h, _ in words if any(k in normalize_word(text) for k in keywords)]
+
+def new_document_index(file_path):
+    with fitz.open(file_path) as doc:
+        return DocumentIndex(file_path, len(doc))
+
+def index_document(file_path, index=None):
+    """Indexa o PDF gerando (índice, página, palavras) a cada página lida
+
+    Quem consome pode buscar nas páginas conforme chegam e parar no meio; ao
+    fechar o gerador, o OCR das páginas que ainda não começaram é cancelado.
+    """
+    if index is None:
+        index = new_document_index(file_path)
+    index.indexing = True
+    try:
+        doc_digest = file_hash(file_path)
+        ocr_cache = get_ocr_cache()
+
+        # Camada de texto e cache são baratos e ficam no processo principal; só as
+        # páginas digitalizadas ainda não lidas vão para o pool de OCR
+        scanned = []
+        doc = fitz.open(file_path)
+        try:
+            for page_index, page in enumerate(doc):
+                words = native_page_words(page)
+                cached = ocr_cache.get(ocr_cache_key(doc_digest, page_index)) if ocr_cache and len(words) < MIN_NATIVE_WORDS else None
+                if len(words) >= MIN_NATIVE_WORDS:
+                    index.add_page(page_index, words, "texto")
+                elif cached and cached["words"] is not None:
+                    words = cached["words"]
+                    index.add_page(page_index, words, "cache")
+                else:
+                    scanned.append(page_index)
+                    continue
+                yield index, page_index, words
+        finally:
+            doc.close()
 
-def process_page(page_index, page, search_term):
-    pix = page.get_pixmap(dpi=DPI)
-    img = Image.open(io.BytesIO(pix.tobytes("png"))).convert("RGB")
-    data = pytesseract.image_to_data(img, output_type=pytesseract.Output.DICT)
+        if scanned:
+            for page_index, words, stats in ocr_pages(file_path, scanned):
+                if ocr_cache:
+                    ocr_cache.put(ocr_cache_key(doc_digest, page_index), " ".join(w[0] for w in words), words)
+                index.add_page(page_index, words, "ocr")
+                index.page_stats[page_index] = stats
+                yield index, page_index, words
 
-    found = False
+        index.complete = True
+    finally:
+        index.indexing = False
+
+def highlight_page(doc, page_index, boxes, method):
+    """Renderiza a página já no tamanho da galeria e desenha as caixas encontradas"""
+    page = doc[page_index]
+    # Renderiza direto na largura da miniatura em vez de reduzir uma imagem em DPI cheio
+    dpi = min(DPI, int(THUMBNAIL_WIDTH * 72 / page.rect.width))
+    scale = dpi / 72
+    img = render_page(page, dpi)
     draw = ImageDraw.Draw(img)
-    for i, word in enumerate(data["text"]):
-        if re.search(search_term, word, re.IGNORECASE):
-            found = True
-            x, y, w, h = data["left"][i], data["top"][i], data["width"][i], data["height"][i]
-            draw.rectangle(
-                [x - PADDING, y - PADDING, x + w + PADDING, y + h + PADDING],
-                outline="red",
-                width=BORDER_WIDTH
-            )
-
-    return (page_index + 1, img) if found else None
-
-def ocr_pdf_with_highlight(file_path, search_term, progress=gr.Progress()):
-    with open(file_path, "rb") as f:
-        pdf_bytes = f.read()
-
-    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-    results = []
-
-    with ThreadPoolExecutor() as executor:
-        futures = {executor.submit(process_page, i, page, search_term): i for i, page in enumerate(doc)}
-        total = len(futures)
-
-        for count, future in enumerate(as_completed(futures)):
-            result = future.result()
-            progress((count + 1) / total, desc=f"🔎 Página {futures[future]+1}/{total}")
-            if result:
-                results.append(result)
-
-    results.sort(key=lambda x: x[0])
-    if results:
-        # Empacota como (imagem, legenda) para exibir o número da página
-        gallery_items = [(img, f"📄 Página {pg}") for pg, img in results]
-        return gallery_items, [pg for pg, _ in results]
-    else:
-        return [], []
+    for x, y, w, h in boxes:
+        x, y, w, h = x * scale, y * scale, w * scale, h * scale
+        draw.rectangle(
+            [x - PADDING, y - PADDING, x + w + PADDING, y + h + PADDING],
+            outline="red",
+            width=BORDER_WIDTH
+        )
+    # Empacota como (imagem, legenda) para exibir o número da página
+    return img, f"📄 Página {page_index + 1} ({METHOD_LABELS[method]})"
+
+def iter_search_hits(file_path, keywords, index=None, poll_interval=0.2):
+    """Gera (índice, página, caixas) das páginas com ocorrências
+
+    Com o índice pronto é só consulta. Enquanto o envio ainda indexa, busca nas
+    páginas já lidas e acompanha as próximas (as sem ocorrência vêm com caixas
+    vazias, para o andamento). Sem índice, ou com a indexação interrompida,
+    indexa e busca ao mesmo tempo, entregando as páginas conforme são lidas.
+    """
+    if index is not None and index.file_path == file_path and index.complete:
+        for page_index, boxes in index.search(keywords).items():
+            yield index, page_index, boxes
+        return
+
+    if index is not None and index.file_path == file_path and index.indexing:
+        reported = set()
+        while True:
+            finished = not index.indexing
+            # Só as páginas já registradas estão com todas as palavras no índice
+            ready = set(index.page_methods) - reported
+            hits = index.search(keywords) if ready else {}
+            for page_index in sorted(ready):
+                yield index, page_index, hits.get(page_index, [])
+            reported |= ready
+            if finished:
+                break
+            time.sleep(poll_interval)
+        if index.complete:
+            return
+
+    for index, page_index, words in index_document(file_path):
+        boxes = match_boxes(words, keywords)
+        yield index, page_index, boxes
 
 # Interface Gradio com tema escuro
-with gr.Blocks(theme=gr.themes.Base()) as demo:
-    gr.Markdown("## 🔍 Leitor de Documentos com OCR e Destaque de Palavras")
-
-    file_input = gr.File(label="📄 Envie um PDF", type="filepath")
-    search_input = gr.Textbox(
-        label="🔎 Palavras para buscar (separe por espaço ou /)",
-        placeholder="Ex: cliente contrato rescisão",
-        visible=False
-    )
-    search_button = gr.Button("Buscar", visible=False)
-    result_gallery = gr.Gallery(label="📚 Páginas com destaque", visible=False, columns=2, height="auto")
-    status_text = gr.Textbox(label="Status", interactive=False)
-    preview_text = gr.Textbox(label="🔍 Palavras interpretadas", interactive=False, visible=False)
-
-    def enable_search(file_path):
-        if file_path and file_path.lower().endswith(".pdf"):
-            return (
-                gr.update(visible=True),
-                gr.update(visible=True),
-                gr.update(value="📥 Arquivo carregado. Pronto para buscar."),
-                gr.update(visible=False)
-            )
-        else:
-            return (
-                gr.update(visible=False),
-                gr.update(visible=False),
-                gr.update(value="⚠️ Por favor, envie um arquivo PDF válido."),
-                gr.update(visible=False)
-            )
-
-    file_input.change(fn=enable_search, inputs=file_input, outputs=[search_input, search_button, status_text, preview_text])
-
-    def search_and_highlight(file_path, search_term_raw):
-        if not search_term_raw.strip():
-            return "❗ Digite ao menos uma palavra para buscar.", gr.update(visible=False), gr.update(visible=False)
-        
-        regex_term, keywords = normalize_search_term(search_term_raw)
-        preview = "🔎 Palavras a buscar: " + ", ".join(keywords)
-        status = "⏳ Processando o documento..."
-        gallery_items, pages = ocr_pdf_with_highlight(file_path, regex_term)
-        
-        if gallery_items:
-            msg = f"✅ Encontrado em {len(pages)} página(s): {pages}"
-            return msg, gr.update(visible=True, value=gallery_items), gr.update(value=preview, visible=True)
-        else:
-            return f"❌ Nenhuma ocorrência de '{search_term_raw}' foi encontrada.", gr.update(visible=False), gr.update(value=preview, visible=True)
-
-    search_button.click(fn=search_and_highlight, inputs=[file_input, search_input], outputs=[status_text, result_gallery, preview_text])
-
-    demo.launch()
+def build_interface():
+    import gradio as gr
+
+    with gr.Blocks(theme=gr.themes.Base()) as demo:
+        gr.Markdown("## 🔍 Leitor de Documentos com OCR e Destaque de Palavras")
+
+        file_input = gr.File(label="📄 Envie um PDF", type="filepath")
+        search_input = gr.Textbox(
+            label="🔎 Palavras para buscar (separe por espaço ou /)",
+            placeholder="Ex: cliente contrato rescisão",
+            visible=False
+        )
+        max_hits_input = gr.Number(label="Parar após N páginas encontradas (0 = todas)", value=0, precision=0, visible=False)
+        with gr.Row():
+            search_button = gr.Button("Buscar", visible=False)
+            stop_button = gr.Button("⏹ Parar", visible=False)
+        result_gallery = gr.Gallery(label="📚 Páginas com destaque", visible=False, columns=2, height="auto")
+        index_status = gr.Textbox(label="📥 Indexação", interactive=False)
+        status_text = gr.Textbox(label="Status", interactive=False)
+        preview_text = gr.Textbox(label="🔍 Palavras interpretadas", interactive=False, visible=False)
+        ocr_report = gr.Textbox(label="⏱️ OCR por página", interactive=False, visible=False, lines=4)
+
+        doc_index = gr.State(None)
+
+        # Mostra a busca antes de indexar: o índice vai para o estado já no início e
+        # as buscas feitas durante a leitura usam as páginas prontas e seguem as próximas
+        def enable_search(file_path):
+            if file_path and file_path.lower().endswith(".pdf"):
+                index = new_document_index(file_path)
+                yield (
+                    gr.update(visible=True),
+                    gr.update(visible=True),
+                    gr.update(visible=True),
+                    gr.update(visible=True),
+                    gr.update(value=f"⏳ Indexando {index.page_count} página(s)... já dá para buscar nas páginas lidas."),
+                    gr.update(visible=False),
+                    gr.update(visible=False),
+                    index
+                )
+                for index, _, _ in index_document(file_path, index):
+                    yield (
+                        gr.update(), gr.update(), gr.update(), gr.update(),
+                        gr.update(value=f"⏳ Indexando página {index.progress_text}... já dá para buscar nas páginas lidas."),
+                        gr.update(), gr.update(), index
+                    )
+                ocr_work = index.describe_ocr_work()
+                yield (
+                    gr.update(), gr.update(), gr.update(), gr.update(),
+                    gr.update(value=f"📥 Arquivo indexado: {index.page_count} página(s) ({index.describe_methods()}), {index.word_count} palavra(s). {ocr_work + '. ' if ocr_work else ''}Pronto para buscar."),
+                    gr.update(),
+                    gr.update(value=index.page_report(), visible=bool(index.page_stats)),
+                    index
+                )
+            else:
+                yield (
+                    gr.update(visible=False),
+                    gr.update(visible=False),
+                    gr.update(visible=False),
+                    gr.update(visible=False),
+                    gr.update(value="⚠️ Por favor, envie um arquivo PDF válido."),
+                    gr.update(visible=False),
+                    gr.update(visible=False),
+                    None
+                )
+
+        # Sem a animação de carregamento, que cobriria os campos de busca enquanto indexa
+        upload_event = file_input.change(
+            fn=enable_search,
+            inputs=file_input,
+            outputs=[search_input, max_hits_input, search_button, stop_button, index_status, preview_text, ocr_report, doc_index],
+            show_progress="hidden"
+        )
+
+        def search_and_highlight(file_path, search_term_raw, index, max_hits):
+            if not search_term_raw.strip():
+                yield "❗ Digite ao menos uma palavra para buscar.", gr.update(visible=False), gr.update(visible=False), index
+                return
+
+            keywords = normalize_search_term(search_term_raw)
+            preview = "🔎 Palavras a buscar: " + ", ".join(keywords)
+            max_hits = int(max_hits or 0)
+            found = {}
+            stopped = False
+
+            doc = fitz.open(file_path)
+            try:
+                yield "⏳ Processando o documento...", gr.update(visible=False), gr.update(value=preview, visible=True), index
+                for index, page_index, boxes in iter_search_hits(file_path, keywords, index):
+                    if not boxes:
+                        # Sem ocorrência só atualiza o andamento se ainda estiver indexando
+                        if not index.complete:
+                            yield f"⏳ Lendo página {index.progress_text}... {len(found)} página(s) encontrada(s)", gr.update(), gr.update(), index
+                        continue
+                    found[page_index] = highlight_page(doc, page_index, boxes, index.page_methods[page_index])
+                    gallery_items = [found[p] for p in sorted(found)]
+                    status = f"⏳ {len(found)} página(s) encontrada(s) até agora ({index.progress_text} lidas)"
+                    yield status, gr.update(visible=True, value=gallery_items), gr.update(), index
+                    if max_hits and len(found) >= max_hits:
+                        stopped = True
+                        break
+            finally:
+                doc.close()
+
+            pages = [p + 1 for p in sorted(found)]
+            if pages:
+                msg = f"✅ Encontrado em {len(pages)} página(s): {pages}"
+                if stopped:
+                    msg += f" — busca parada após {max_hits} página(s)"
+                yield msg, gr.update(visible=True, value=[found[p] for p in sorted(found)]), gr.update(), index
+            else:
+                yield f"❌ Nenhuma ocorrência de '{search_term_raw}' foi encontrada.", gr.update(visible=False), gr.update(), index
+
+        search_event = search_button.click(
+            fn=search_and_highlight,
+            inputs=[file_input, search_input, doc_index, max_hits_input],
+            outputs=[status_text, result_gallery, preview_text, doc_index]
+        )
+        # Interrompe a indexação/busca em andamento; o OCR das páginas pendentes é cancelado
+        stop_button.click(fn=lambda: "⏹ Busca interrompida.", outputs=status_text, cancels=[upload_event, search_event])
+
+    return demo
+
+if __name__ == "__main__":
+    build_interface().launch()
@@ -0,0 +1,118 @@
+"""
+Benchmark do pré-processamento das fotos de cartões GD.
+
+Compara a cadeia PIL original (cinza -> contraste 2.0 -> nitidez 2.0 -> largura 800)
+com o pipeline OpenCV/NumPy (leitura reduzida do JPEG, escala pela altura das letras,
+recorte do cartão, correção de inclinação e limiar adaptativo):
+
+- vazão do pré-processamento (imagens/s) e tamanho da imagem entregue ao OCR;
+- com o Tesseract disponível, tempo de OCR e campos extraídos;
+- com um CSV de referência (mesmo formato do "Exportar CSV" do leitor, com a coluna
+  Arquivo), a acurácia por campo de cada caminho.
+
+Uso:
+    python benchmarks/bench_card_preprocessing.py pasta_dos_cartoes [--ground-truth ref.csv]
+        [--limit 50] [--no-ocr] [--tesseract caminho]
+"""
+
+import argparse
+import csv
+import os
+import sys
+import time
+from importlib.machinery import SourceFileLoader
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from PIL import Image
+import pytesseract
+
+cards = SourceFileLoader("leitor_cards_gd", os.path.join(ROOT, "Leitor de Cards do GD")).load_module()
+
+FIELDS = ("ID", "CDD", "ACT", "PDD0", "PDD1", "PDD2", "HH EST", "HH PROC", "CONC.ACT")
+
+
+def pil_chain(path):
+    return cards.ImageProcessor.enhance_image(Image.open(path))
+
+
+def opencv_pipeline(path):
+    return cards.ImageProcessor.prepare_card(path)
+
+
+def load_ground_truth(csv_path):
+    with open(csv_path, newline='', encoding='utf-8') as file:
+        return {row['Arquivo']: row for row in csv.DictReader(file)}
+
+
+def run(name, prepare, paths, ocr, truth):
+    prep_time = ocr_time = 0.0
+    pixels = 0
+    correct = total = 0
+    for path in paths:
+        started = time.perf_counter()
+        image = prepare(path)
+        image.load()
+        prep_time += time.perf_counter() - started
+        pixels += image.width * image.height
+        if not ocr:
+            continue
+
+        started = time.perf_counter()
+        text = cards.get_engine(cards.TextExtractor.LANG, cards.TextExtractor.CUSTOM_CONFIG).image_to_string(image)
+        ocr_time += time.perf_counter() - started
+        expected = truth.get(os.path.basename(path))
+        if expected:
+            fields = cards.FieldExtractor.extract_fields(text.strip())
+            for field in FIELDS:
+                total += 1
+                correct += fields.get(field, "").strip() == (expected.get(field) or "").strip()
+
+    line = (f"{name:8s} pré-processamento {len(paths) / prep_time:6.1f} img/s "
+            f"({prep_time / len(paths) * 1000:6.1f} ms/img), {pixels / len(paths) / 1e6:5.2f} Mpx/img")
+    if ocr:
+        line += f" | OCR {ocr_time / len(paths) * 1000:7.1f} ms/img"
+    if total:
+        line += f" | campos corretos {correct}/{total} ({correct / total:.0%})"
+    print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('folder', help="Pasta com fotos de cartões")
+    parser.add_argument('--ground-truth', help="CSV com os valores corretos de cada cartão")
+    parser.add_argument('--limit', type=int, default=50)
+    parser.add_argument('--no-ocr', action='store_true', help="Mede só o pré-processamento")
+    parser.add_argument('--tesseract', help="Caminho do executável do tesseract (padrão: procura no sistema)")
+    args = parser.parse_args()
+
+    if cards.cv2 is None:
+        sys.exit("OpenCV/NumPy não instalados: pip install opencv-python-headless numpy")
+
+    paths = []
+    for path in cards.FileManager.get_image_files(args.folder)[:args.limit]:
+        try:
+            with Image.open(path) as image:
+                image.verify()
+            paths.append(path)
+        except OSError as e:
+            print(f"Ignorando {path}: {e}")
+    if not paths:
+        sys.exit(f"Nenhuma imagem em {args.folder}")
+
+    ocr = not args.no_ocr
+    if ocr:
+        if args.tesseract:
+            pytesseract.pytesseract.tesseract_cmd = args.tesseract
+        elif not cards.TesseractConfig.setup_tesseract():
+            sys.exit("Tesseract não encontrado; informe --tesseract ou use --no-ocr")
+    truth = load_ground_truth(args.ground_truth) if args.ground_truth else {}
+
+    print(f"{len(paths)} cartões de {args.folder}")
+    run("PIL", pil_chain, paths, ocr, truth)
+    run("OpenCV", opencv_pipeline, paths, ocr, truth)
+
+
+if __name__ == '__main__':
+    main()
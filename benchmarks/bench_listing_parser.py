@@ -0,0 +1,90 @@
+"""
+Micro-benchmark do parser de listagens de pasta usado pelo Legacy Searcher.
+
+Compara o extrator em streaming (parse_listing) com o caminho anterior via
+BeautifulSoup, em uma listagem salva do servidor (ex: "Salvar como..." da página
+Desenhos/Produtos no navegador) ou, sem argumentos, em uma listagem sintética no
+formato do Apache com milhares de links.
+
+Uso:
+    python benchmarks/bench_listing_parser.py [listagem.html] [--repeat 20]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from legacy_backends import parse_listing, get_web_matchers
+
+
+def synthetic_listing(folders=3000):
+    """Gera uma listagem parecida com o índice automático do Apache"""
+    rows = [
+        f'<tr><td valign="top"><img src="/icons/folder.gif" alt="[DIR]"></td>'
+        f'<td><a href="{i:03d}%20-%20Produto%20{i}/">{i:03d} - Produto {i}/</a></td>'
+        f'<td align="right">2019-05-{i % 28 + 1:02d} 10:{i % 60:02d}  </td><td align="right">  - </td></tr>'
+        for i in range(folders)
+    ]
+    return (
+        '<!DOCTYPE HTML PUBLIC "-//W3C//DTD HTML 3.2 Final//EN"><html><head><title>Index of /Produtos</title>'
+        '</head><body><h1>Index of /Produtos</h1><table>' + '\n'.join(rows) + '</table></body></html>'
+    )
+
+
+def bs4_links(html):
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, 'html.parser')
+    return [(link['href'], link.text) for link in soup.find_all('a', href=True)]
+
+
+def streaming_links(html, chunk_size=64 * 1024):
+    return parse_listing(html[i:i + chunk_size] for i in range(0, len(html), chunk_size))
+
+
+def timed(func, html, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func(html)
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('listing', nargs='?', help="Arquivo HTML de uma listagem salva")
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--code', default='180-570-542', help="Código usado para medir o casamento dos padrões")
+    args = parser.parse_args()
+
+    if args.listing:
+        with open(args.listing, encoding='utf-8', errors='replace') as f:
+            html = f.read()
+        source = args.listing
+    else:
+        html = synthetic_listing()
+        source = "listagem sintética"
+
+    print(f"Fonte: {source} ({len(html) / 1024:.0f} KB)")
+
+    bs4_time, bs4_result = timed(bs4_links, html, args.repeat)
+    stream_time, stream_result = timed(streaming_links, html, args.repeat)
+    if [href for href, _ in bs4_result] != [href for href, _ in stream_result]:
+        print("⚠️ Os dois parsers encontraram links diferentes!")
+
+    print(f"Links encontrados: {len(stream_result)}")
+    print(f"BeautifulSoup:    {bs4_time * 1000:8.2f} ms")
+    print(f"Streaming:        {stream_time * 1000:8.2f} ms  ({bs4_time / stream_time:.1f}x)")
+
+    matchers = get_web_matchers(args.code)
+    started = time.perf_counter()
+    for _ in range(args.repeat):
+        next((href for href, text in stream_result if matchers["first_level"].match(text.strip('/'))), None)
+    print(f"Casamento do prefixo (padrão pré-compilado): {(time.perf_counter() - started) / args.repeat * 1000:.3f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+Benchmark dos motores de OCR em fotos de cartões GD.
+
+Mede a latência por imagem do pytesseract (um processo do tesseract por imagem) e
+do tesserocr (API do Tesseract carregada uma vez), com o mesmo pré-processamento,
+idioma e configuração do Leitor de Cards do GD. As imagens são preparadas antes da
+medição, então o tempo é só o do OCR.
+
+Uso:
+    python benchmarks/bench_ocr_backend.py pasta_dos_cartoes [--limit 30] [--tesseract caminho]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from importlib.machinery import SourceFileLoader
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from PIL import Image
+import pytesseract
+
+from ocr_engine import ENGINES
+
+cards = SourceFileLoader("leitor_cards_gd", os.path.join(ROOT, "Leitor de Cards do GD")).load_module()
+
+
+def load_images(folder, limit):
+    images = []
+    for path in cards.FileManager.get_image_files(folder)[:limit]:
+        try:
+            images.append((path, cards.ImageProcessor.enhance_image(Image.open(path))))
+        except OSError as e:
+            print(f"Ignorando {path}: {e}")
+    return images
+
+
+def run_engine(name, images):
+    """Retorna (tempo de criação do motor, [latência por imagem], [texto])"""
+    started = time.perf_counter()
+    engine = ENGINES[name](cards.TextExtractor.LANG, cards.TextExtractor.CUSTOM_CONFIG)
+    setup = time.perf_counter() - started
+
+    latencies, texts = [], []
+    for _, image in images:
+        started = time.perf_counter()
+        texts.append(engine.image_to_string(image).strip())
+        latencies.append(time.perf_counter() - started)
+    engine.close()
+    return setup, latencies, texts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('folder', help="Pasta com fotos de cartões")
+    parser.add_argument('--limit', type=int, default=30)
+    parser.add_argument('--tesseract', help="Caminho do executável do tesseract (padrão: procura no sistema)")
+    args = parser.parse_args()
+
+    if args.tesseract:
+        pytesseract.pytesseract.tesseract_cmd = args.tesseract
+    elif not cards.TesseractConfig.setup_tesseract():
+        sys.exit("Tesseract não encontrado; informe --tesseract")
+
+    images = load_images(args.folder, args.limit)
+    if not images:
+        sys.exit(f"Nenhuma imagem em {args.folder}")
+    print(f"{len(images)} cartões de {args.folder}")
+
+    results = {}
+    for name in ENGINES:
+        try:
+            results[name] = run_engine(name, images)
+        except ImportError:
+            print(f"{name}: não instalado, pulando")
+
+    baseline = results.get("pytesseract")
+    for name, (setup, latencies, texts) in results.items():
+        median = statistics.median(latencies)
+        p95 = sorted(latencies)[int(len(latencies) * 0.95) - 1 if len(latencies) > 1 else 0]
+        line = (f"{name:12s} criação {setup * 1000:7.1f} ms | por imagem: média {statistics.mean(latencies) * 1000:7.1f} ms, "
+                f"mediana {median * 1000:7.1f} ms, p95 {p95 * 1000:7.1f} ms")
+        if baseline and name != "pytesseract":
+            line += f" | {statistics.median(baseline[1]) / median:.1f}x"
+            same = sum(a == b for a, b in zip(baseline[2], texts))
+            line += f" | texto idêntico em {same}/{len(texts)}"
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
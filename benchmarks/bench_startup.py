@@ -0,0 +1,130 @@
+"""
+Benchmark da inicialização do Localizador de Desenhos (Legacy Searcher).
+
+Cada medida roda num processo novo, como na abertura do executável:
+
+- primeira tela: importar o streamlit e executar o script pela primeira vez (AppTest),
+  que é o que o usuário espera depois que o servidor sobe;
+- reexecuções: cada clique no Streamlit executa o script de novo;
+- servidor pronto: `streamlit run` até o /_stcore/health responder;
+- tamanho do executável gerado pelo PyInstaller (arquivo do --onefile ou pasta do --onedir).
+
+Para comparar antes e depois, meça o script de outra versão:
+    git show <commit>:Legacy_Searcher.py > /tmp/Legacy_Searcher_antigo.py
+    python benchmarks/bench_startup.py --script /tmp/Legacy_Searcher_antigo.py
+
+Uso:
+    python benchmarks/bench_startup.py [--script Legacy_Searcher.py] [--runs 5] [--reruns 10]
+        [--no-server] [--bundle dist/LegacySearcher.exe]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from executavel_launcher import get_free_port, wait_until_ready
+
+# Roda no processo filho: argv = [script, reexecuções, pasta do projeto]
+FIRST_RENDER = """
+import json, sys, time
+started = time.perf_counter()
+import streamlit
+from streamlit.testing.v1 import AppTest
+imported = time.perf_counter()
+sys.path.insert(0, sys.argv[3])
+app = AppTest.from_file(sys.argv[1], default_timeout=120)
+app.run()
+rendered = time.perf_counter()
+reruns = []
+for _ in range(int(sys.argv[2])):
+    begin = time.perf_counter()
+    app.run()
+    reruns.append(time.perf_counter() - begin)
+print(json.dumps({
+    "streamlit": imported - started,
+    "first_run": rendered - imported,
+    "first_render": rendered - started,
+    "rerun": min(reruns) if reruns else None,
+    "requests_loaded": "requests" in sys.modules,
+    "errors": [str(error.value) for error in app.exception],
+}))
+"""
+
+
+def first_render(script, reruns):
+    output = subprocess.run(
+        [sys.executable, "-c", FIRST_RENDER, script, str(reruns), ROOT],
+        capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def server_ready(script):
+    port = get_free_port(8600)
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", script, f"--server.port={port}", "--server.headless=true",
+         "--browser.gatherUsageStats=false", "--server.fileWatcherType=none"],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, cwd=ROOT
+    )
+    try:
+        ready = wait_until_ready(port, process, timeout=120)
+        return time.perf_counter() - started if ready else None
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def bundle_size(path):
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(
+        os.path.getsize(os.path.join(folder, name))
+        for folder, _, names in os.walk(path) for name in names
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--script', default=os.path.join(ROOT, "Legacy_Searcher.py"))
+    parser.add_argument('--runs', type=int, default=5, help="Processos novos por medida (mostra a mediana)")
+    parser.add_argument('--reruns', type=int, default=10, help="Reexecuções do script em cada processo")
+    parser.add_argument('--no-server', action='store_true', help="Não mede a subida do servidor")
+    parser.add_argument('--bundle', help="Executável ou pasta gerados pelo PyInstaller")
+    args = parser.parse_args()
+
+    script = os.path.abspath(args.script)
+    print(f"{script} ({args.runs} processos)")
+    results = [first_render(script, args.reruns) for _ in range(args.runs)]
+    if results[0]["errors"]:
+        print(f"⚠️ Erros na execução do script: {results[0]['errors']}")
+
+    def median(key):
+        return statistics.median(result[key] for result in results) * 1000
+
+    print(f"primeira tela   {median('first_render'):7.0f} ms "
+          f"(import do streamlit {median('streamlit'):.0f} ms + primeira execução {median('first_run'):.0f} ms)")
+    if args.reruns:
+        print(f"reexecução      {median('rerun'):7.1f} ms")
+    print(f"requests carregado na primeira tela: {'sim' if results[0]['requests_loaded'] else 'não'}")
+
+    if not args.no_server:
+        times = [seconds for seconds in (server_ready(script) for _ in range(args.runs)) if seconds is not None]
+        if times:
+            print(f"servidor pronto {statistics.median(times) * 1000:7.0f} ms")
+        else:
+            print("servidor não respondeu")
+
+    if args.bundle:
+        print(f"executável      {bundle_size(args.bundle) / 1024 / 1024:7.1f} MB ({args.bundle})")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,11 +1,47 @@
+import time
+STARTED = time.perf_counter()
+
 import sys
 import os
+import json
+import signal
 import subprocess
+import tempfile
 import webbrowser
-import time
-import threading
 import socket
-import psutil
+import urllib.request
+from datetime import datetime
+
+APP_URL = "http://localhost:{port}"
+# Streamlit >= 1.18 responde em /_stcore/health; versões antigas em /healthz
+HEALTH_PATHS = ("/_stcore/health", "/healthz")
+# Arquivo com o pid e a porta do servidor em execução, para reaproveitar em vez de matar
+LOCK_PATH = os.path.join(tempfile.gettempdir(), "legacy_searcher.lock")
+# Tempos de cada fase da inicialização, um registro por execução
+TIMING_LOG = os.path.join(tempfile.gettempdir(), "legacy_searcher_startup.log")
+STARTUP_TIMEOUT = 90
+
+class StartupTimer:
+    """Mede cada fase da inicialização (desde o início do processo) para achar o gargalo"""
+
+    def __init__(self):
+        self.last = STARTED
+        self.phases = []
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.phases.append((phase, now - self.last))
+        self.last = now
+
+    def report(self):
+        total = self.last - STARTED
+        line = " | ".join(f"{phase} {seconds:.2f}s" for phase, seconds in self.phases) + f" | total {total:.2f}s"
+        print(f"⏱️ Inicialização: {line}")
+        try:
+            with open(TIMING_LOG, "a", encoding="utf-8") as file:
+                file.write(f"{datetime.now():%Y-%m-%d %H:%M:%S} frozen={getattr(sys, 'frozen', False)} {line}\n")
+        except OSError:
+            pass
 
 def get_free_port(start_port=8501):
     """Encontra uma porta livre a partir da porta inicial"""
@@ -20,45 +56,151 @@ def get_free_port(start_port=8501):
     raise Exception("Nenhuma porta disponível encontrada")
 
 def is_streamlit_running(port):
-    """Verifica se já existe um processo Streamlit rodando na porta"""
+    """Verifica se já existe um processo escutando na porta"""
     try:
         with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+            s.settimeout(0.5)
             result = s.connect_ex(('localhost', port))
             return result == 0
-    except:
+    except OSError:
         return False
 
-def kill_streamlit_processes():
-    """Mata processos Streamlit existentes para evitar conflitos"""
+def is_healthy(port):
+    """Pergunta ao próprio Streamlit se ele já está pronto para atender"""
+    for path in HEALTH_PATHS:
+        try:
+            with urllib.request.urlopen(APP_URL.format(port=port) + path, timeout=1) as response:
+                if response.status == 200:
+                    return True
+        except OSError:
+            continue
+    return False
+
+def wait_until_ready(port, process=None, timeout=STARTUP_TIMEOUT):
+    """Sonda o health check até o servidor responder; False se ele morrer ou estourar o prazo"""
+    deadline = time.monotonic() + timeout
+    delay = 0.05
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            return False
+        # Sem nada escutando ainda não adianta fazer a requisição HTTP
+        if is_streamlit_running(port) and is_healthy(port):
+            return True
+        time.sleep(delay)
+        delay = min(delay * 1.5, 0.25)
+    return False
+
+def pid_alive(pid):
+    """Verifica se o processo existe (no Windows os.kill(pid, 0) mataria o processo)"""
+    if os.name == "nt":
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            return False
+        exit_code = ctypes.c_ulong()
+        kernel32.GetExitCodeProcess(handle, ctypes.byref(exit_code))
+        kernel32.CloseHandle(handle)
+        return exit_code.value == 259  # STILL_ACTIVE
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def read_lock():
+    """Retorna {"pid", "port", "launcher", "created"} da última execução, ou None"""
     try:
-        for proc in psutil.process_iter(['pid', 'name', 'cmdline']):
-            if 'streamlit' in ' '.join(proc.info['cmdline']).lower():
-                proc.kill()
-                time.sleep(1)
-    except:
-        pass
-
-def open_browser(port):
-    """Abre o navegador após delay"""
-    time.sleep(5)  # Aguarda mais tempo
-    if not is_streamlit_running(port):
-        return
-    webbrowser.open(f'http://localhost:{port}')
+        with open(LOCK_PATH, encoding="utf-8") as file:
+            lock = json.load(file)
+        return lock if isinstance(lock.get("pid"), int) and isinstance(lock.get("port"), int) else None
+    except (OSError, ValueError):
+        return None
+
+def write_lock(pid, port):
+    temp_path = f"{LOCK_PATH}.{os.getpid()}"
+    with open(temp_path, "w", encoding="utf-8") as file:
+        json.dump({"pid": pid, "port": port, "launcher": os.getpid(), "created": time.time()}, file)
+    os.replace(temp_path, LOCK_PATH)
+
+def remove_lock(pid):
+    """Apaga o lockfile só se ainda for deste servidor"""
+    lock = read_lock()
+    if lock and lock["pid"] == pid:
+        try:
+            os.remove(LOCK_PATH)
+        except OSError:
+            pass
+
+def reuse_running_instance():
+    """Porta de uma instância saudável já aberta (ou que está subindo); encerra a registrada se travou"""
+    lock = read_lock()
+    if not lock:
+        return None
+    pid, port = lock["pid"], lock["port"]
+    if not pid_alive(pid):
+        return None
+    if is_healthy(port):
+        return port
+    # Outro launcher acabou de iniciar o servidor: espera por ele em vez de abrir um segundo.
+    # O streamlit abre a porta antes de ficar pronto e o health check responde "unavailable"
+    # nesse meio-tempo, então dentro do prazo de subida não importa se a porta já está aberta.
+    age = time.time() - lock.get("created", 0)
+    if age < STARTUP_TIMEOUT:
+        print("⏳ Outra instância está iniciando, aguardando...")
+        if wait_until_ready(port, timeout=STARTUP_TIMEOUT - age):
+            return port
+        lock = read_lock()
+        if not lock or lock["pid"] != pid or not pid_alive(pid):
+            return None
+    # Passado o prazo de subida, escutando na porta registrada mas sem responder: é o nosso
+    # servidor travado. Porta fechada com o pid vivo é outro processo que reaproveitou o
+    # número, então não mexe.
+    if is_streamlit_running(port):
+        print(f"⚠️ Instância anterior (pid {pid}) não responde, encerrando...")
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except OSError:
+            pass
+        deadline = time.monotonic() + 10
+        while pid_alive(pid) and time.monotonic() < deadline:
+            time.sleep(0.05)
+    return None
+
+def run_streamlit_cli():
+    """No executável, sys.executable é o próprio launcher: o "-m streamlit" do servidor volta para cá"""
+    from streamlit.web import cli
+    sys.argv = ["streamlit"] + sys.argv[3:]
+    sys.exit(cli.main())
 
 if __name__ == "__main__":
+    if getattr(sys, 'frozen', False) and sys.argv[1:3] == ["-m", "streamlit"]:
+        run_streamlit_cli()
+
     print("🔄 Iniciando Localizador de Desenhos...")
-    
-    # Mata processos Streamlit existentes
-    kill_streamlit_processes()
-    
+    timer = StartupTimer()
+    timer.mark("imports")
+
+    # Reaproveita o servidor que já estiver aberto
+    port = reuse_running_instance()
+    timer.mark("instância anterior")
+    if port:
+        print(f"✅ Localizador já está aberto na porta {port}, abrindo navegador...")
+        webbrowser.open(APP_URL.format(port=port))
+        timer.mark("navegador")
+        timer.report()
+        sys.exit(0)
+
     # Localiza o script no executável
     if getattr(sys, 'frozen', False):
         base_path = sys._MEIPASS
     else:
         base_path = os.path.dirname(os.path.abspath(__file__))
-    
+
     script_path = os.path.join(base_path, "Legacy_Searcher.py")
-    
+
     if not os.path.exists(script_path):
         print(f"❌ Script não encontrado: {script_path}")
         input("Pressione Enter para sair...")
@@ -72,35 +214,48 @@ if __name__ == "__main__":
         print(f"❌ Erro ao encontrar porta: {e}")
         input("Pressione Enter para sair...")
         sys.exit(1)
+    timer.mark("porta")
 
-    # Verifica se já não está rodando
-    if is_streamlit_running(port):
-        print(f"⚠️ Streamlit já rodando na porta {port}, abrindo navegador...")
-        webbrowser.open(f'http://localhost:{port}')
-        input("Pressione Enter para sair...")
-        sys.exit(0)
-
-    # Abre browser automaticamente
-    browser_thread = threading.Thread(target=open_browser, args=(port,), daemon=True)
-    browser_thread.start()
-    
+    process = None
     try:
         # Configurações mais restritivas para evitar loops
         env = os.environ.copy()
         env['STREAMLIT_BROWSER_GATHER_USAGE_STATS'] = 'false'
         env['STREAMLIT_SERVER_HEADLESS'] = 'true'
-        
-        subprocess.run([
+
+        process = subprocess.Popen([
             sys.executable, "-m", "streamlit", "run", script_path,
             f"--server.port={port}",
             "--server.headless=true",
             "--browser.gatherUsageStats=false",
             "--server.enableCORS=false",
             "--server.enableXsrfProtection=false",
-            "--browser.serverAddress=localhost"
+            "--browser.serverAddress=localhost",
+            # Fora do site-packages (no executável) o streamlit se considera em modo de
+            # desenvolvimento, ignora a porta e procura o frontend num servidor à parte
+            "--global.developmentMode=false",
+            # O script empacotado não muda: observar arquivos só atrasa a subida
+            "--server.fileWatcherType=none"
         ], env=env)
+        write_lock(process.pid, port)
+        timer.mark("processo")
+
+        # Abre o navegador assim que o servidor responder
+        if wait_until_ready(port, process):
+            timer.mark("servidor pronto")
+            webbrowser.open(APP_URL.format(port=port))
+            timer.mark("navegador")
+            timer.report()
+        elif process.poll() is None:
+            print(f"⚠️ O servidor não respondeu em {STARTUP_TIMEOUT}s; abra {APP_URL.format(port=port)} manualmente")
+        process.wait()
     except KeyboardInterrupt:
         print("\n🛑 Aplicação encerrada pelo usuário")
+        if process is not None:
+            process.terminate()
     except Exception as e:
         print(f"❌ Erro: {e}")
-        input("Pressione Enter para sair...")
\ No newline at end of file
+        input("Pressione Enter para sair...")
+    finally:
+        if process is not None:
+            remove_lock(process.pid)
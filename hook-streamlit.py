@@ -1,14 +1,29 @@
-from PyInstaller.utils.hooks import collect_all, collect_data_files
+from PyInstaller.utils.hooks import collect_data_files, copy_metadata
 
-datas, binaries, hiddenimports = collect_all('streamlit')
+# Só o que o Localizador usa: o frontend (static/) e os metadados que o streamlit
+# consulta ao iniciar. O collect_all('streamlit') levava todos os submódulos, os
+# exemplos do "streamlit hello" e os testes, que o --onefile descompacta a cada abertura.
+datas = collect_data_files('streamlit', includes=['static/**'])
+datas += copy_metadata('streamlit')
 
-# Adiciona imports essenciais que seu app usa
-hiddenimports += [
+# Legacy_Searcher.py e legacy_backends.py entram como dados (o streamlit executa o
+# script do disco), então o PyInstaller não enxerga os imports deles: ficam listados aqui.
+hiddenimports = [
     'streamlit.web.cli',
+    'streamlit.web.bootstrap',
     'streamlit.runtime.scriptrunner.magic_funcs',
     'requests',
-    'bs4',
+    'openpyxl',
+    'html.parser',
+    'sqlite3',
     'zipfile',
-    'io',
-    'logging'
+]
+
+# Bibliotecas de gráficos e notebooks que o streamlit importa só se existirem
+excludedimports = [
+    'matplotlib',
+    'plotly',
+    'bokeh',
+    'graphviz',
+    'IPython',
 ]
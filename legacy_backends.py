@@ -0,0 +1,1034 @@
+"""
+Buscas do Localizador de Desenhos Técnicos Legacy (web, Desativados e FMC), sem interface.
+
+O Streamlit executa o Legacy_Searcher.py de novo a cada interação; este módulo é
+importado uma vez por processo, então as definições e os recursos compartilhados
+(sessão HTTP, cache de listagens, índice da rede local, cache de resultados) ficam
+prontos entre as execuções. requests e zipfile só são importados quando a web é
+consultada ou um ZIP é montado, o que deixa a primeira tela mais rápida.
+"""
+
+from html.parser import HTMLParser
+import re
+import os
+import tempfile
+from io import BytesIO, FileIO, RawIOBase
+import logging
+import sqlite3
+import json
+import time
+import threading
+from contextlib import contextmanager
+from collections import OrderedDict
+from functools import lru_cache, wraps
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+logger = logging.getLogger(__name__)
+
+WEB_BASE_URL = "http://rio1web.net.fmcti.com/ipd/fmc_released_legacy/Desenhos/Produtos"
+DESATIVADOS_PATH = r"\\rio-data-srv\arquivo\Desativados"
+FMC_PATH = r"\\rio-data-srv\arquivo\FMC"
+
+# Índice persistente dos .tif das pastas de rede (uma raiz por pasta configurada)
+INDEXED_ROOTS = [DESATIVADOS_PATH, FMC_PATH]
+INDEX_DB_PATH = os.environ.get(
+    "LEGACY_SEARCHER_INDEX",
+    os.path.join(os.path.expanduser("~"), ".legacy_searcher", "drawing_index.sqlite3")
+)
+INDEX_MAX_AGE = 24 * 60 * 60  # segundos até o índice de uma raiz ser considerado desatualizado
+
+ZIP_CHUNK_SIZE = 1024 * 1024  # bytes lidos/baixados por vez ao montar um ZIP
+DOWNLOAD_WORKERS = 4  # páginas baixadas ao mesmo tempo para um ZIP
+DOWNLOAD_RETRIES = 3
+DOWNLOAD_BACKOFF = 1.0  # segundos de espera antes da 2ª tentativa, dobrando a cada nova falha
+BATCH_WORKERS = 6  # códigos resolvidos ao mesmo tempo na busca em lote
+
+# Cache de resultados compartilhado entre sessões (e entre reinícios, se houver arquivo)
+RESULT_CACHE_PATH = os.environ.get(
+    "LEGACY_SEARCHER_RESULT_CACHE",
+    os.path.join(os.path.expanduser("~"), ".legacy_searcher", "result_cache.json")
+)
+RESULT_CACHE_TTL = 4 * 60 * 60
+RESULT_CACHE_SIZE = 500
+
+# Cache das listagens de pasta da web
+LISTING_CACHE_TTL = 10 * 60  # segundos em que uma listagem é reutilizada sem consultar o servidor
+LISTING_CACHE_SIZE = 256
+
+class SearchCancelled(Exception):
+    """Busca interrompida pelo usuário ou por um resultado já encontrado em outra fonte"""
+
+def check_cancelled(cancel_event):
+    if cancel_event is not None and cancel_event.is_set():
+        raise SearchCancelled("Busca interrompida")
+
+# Função para formatar o código de desenho para a pasta Desativados
+def format_drawing_code_desativados(drawing_code):
+    parts = drawing_code.split('-')
+    formatted_parts = [parts[0].zfill(3)] + parts[1:]
+    return '-'.join(formatted_parts)
+
+# Função para formatar o código de desenho para a pasta FMC (sem formatação)
+def format_drawing_code_fmc(drawing_code):
+    return drawing_code
+
+# Recursos compartilhados entre sessões e threads: criados na primeira chamada, um por processo
+def process_resource(factory):
+    lock = threading.Lock()
+    instance = []
+
+    @wraps(factory)
+    def get():
+        if not instance:
+            with lock:
+                if not instance:
+                    instance.append(factory())
+        return instance[0]
+
+    get.clear = instance.clear
+    return get
+
+# Sessão HTTP compartilhada (keep-alive e pool de conexões) entre buscas e usuários
+@process_resource
+def get_http_session():
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+class AnchorExtractor(HTMLParser):
+    """Coleta os pares (href, texto) dos links conforme o HTML chega, sem montar a árvore do documento"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.links = []
+        self._href = None
+        self._text = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag != 'a':
+            return
+        href = next((value for name, value in attrs if name == 'href'), None)
+        if href is not None:
+            self._href = href
+            self._text = []
+
+    def handle_data(self, data):
+        if self._href is not None:
+            self._text.append(data)
+
+    def handle_endtag(self, tag):
+        if tag == 'a' and self._href is not None:
+            self.links.append((self._href, ''.join(self._text)))
+            self._href = None
+
+# Extrai os pares (href, texto) dos links de uma listagem de pasta; aceita o HTML
+# inteiro ou os pedaços de uma resposta em streaming
+def parse_listing(chunks):
+    parser = AnchorExtractor()
+    if isinstance(chunks, str):
+        chunks = [chunks]
+    for chunk in chunks:
+        parser.feed(chunk)
+    parser.close()
+    return parser.links
+
+# Padrões de navegação na web pré-compilados por código de desenho
+@lru_cache(maxsize=512)
+def get_web_matchers(drawing_code):
+    parts = drawing_code.split('-')
+    return {
+        "first_level": re.compile(rf"^{re.escape(parts[0])}\b"),
+        "second_level": re.compile(rf"^{re.escape(parts[0])}-{re.escape(parts[1])}\b"),
+        "file": re.compile(rf"^{re.escape(drawing_code)}(?:-(\d+))?(?:-([A-Z]))?\.tif$"),
+    }
+
+class ListingCache:
+    """Cache LRU com TTL das listagens já interpretadas, revalidado por ETag/Last-Modified"""
+
+    def __init__(self, session, max_entries=LISTING_CACHE_SIZE, ttl=LISTING_CACHE_TTL):
+        self.session = session
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, url, max_age=None):
+        """Retorna os links da listagem; None se o servidor não responder com sucesso"""
+        max_age = self.ttl if max_age is None else max_age
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry:
+                self._entries.move_to_end(url)
+        if entry and time.time() - entry["fetched_at"] < max_age:
+            return entry["links"]
+
+        headers = {}
+        if entry and entry["etag"]:
+            headers['If-None-Match'] = entry["etag"]
+        if entry and entry["last_modified"]:
+            headers['If-Modified-Since'] = entry["last_modified"]
+        with self.session.get(url, headers=headers, timeout=10, stream=True) as response:
+            if response.status_code == 304 and entry:
+                entry = dict(entry, fetched_at=time.time())
+            elif response.status_code == 200:
+                response.encoding = response.encoding or 'utf-8'
+                entry = {
+                    "links": parse_listing(response.iter_content(64 * 1024, decode_unicode=True)),
+                    "etag": response.headers.get('ETag'),
+                    "last_modified": response.headers.get('Last-Modified'),
+                    "fetched_at": time.time(),
+                }
+            else:
+                return None
+
+        with self._lock:
+            self._entries[url] = entry
+            self._entries.move_to_end(url)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry["links"]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+@process_resource
+def get_listing_cache():
+    return ListingCache(get_http_session())
+
+# Busca na web. As listagens da raiz e do primeiro nível vêm do cache; a pasta final
+# é sempre revalidada (requisição condicional) para não perder revisões novas.
+def get_latest_drawing_urls(base_url, drawing_code, cancel_event=None):
+    import requests
+
+    drawing_code = format_drawing_code_desativados(drawing_code)
+    parts = drawing_code.split('-')
+    if len(parts) != 3:
+        raise ValueError("Formato inválido. Use: 'xxx-xxx-xxx'")
+
+    matchers = get_web_matchers(drawing_code)
+    listing_cache = get_listing_cache()
+    try:
+        links = listing_cache.get(base_url)
+        if links is None:
+            raise Exception(f"Erro ao acessar a pasta raiz: {base_url}")
+
+        first_level_folder = next((href for href, text in links
+                                   if matchers["first_level"].match(text.strip('/'))), None)
+        if not first_level_folder:
+            raise Exception(f"Nenhuma pasta encontrada para o prefixo: {parts[0]}")
+        first_level_url = base_url.rstrip('/') + '/' + first_level_folder
+        check_cancelled(cancel_event)
+
+        links = listing_cache.get(first_level_url)
+        if links is None:
+            raise Exception(f"Erro ao acessar a subpasta: {first_level_url}")
+        second_level_folder = next((href for href, text in links
+                                    if matchers["second_level"].match(text.strip('/'))), None)
+        if not second_level_folder:
+            raise Exception(f"Nenhuma subpasta encontrada para: {parts[0]}-{parts[1]}")
+        second_level_url = first_level_url.rstrip('/') + '/' + second_level_folder
+        check_cancelled(cancel_event)
+
+        links = listing_cache.get(second_level_url, max_age=0)
+        if links is None:
+            raise Exception(f"Erro ao acessar a subpasta final: {second_level_url}")
+
+        file_matches = [(href, matchers["file"].match(href)) for href, text in links]
+        file_matches = [(href, match) for href, match in file_matches if match]
+
+        if not file_matches:
+            raise Exception(f"Nenhum arquivo encontrado para: {drawing_code}")
+
+        grouped = {}
+        for file, match in file_matches:
+            revision = match.group(2) or ''
+            if revision not in grouped:
+                grouped[revision] = []
+            grouped[revision].append(second_level_url.rstrip('/') + '/' + file)
+
+        latest_revision = sorted(grouped.keys(), reverse=True)[0]
+        return grouped[latest_revision], latest_revision
+
+    except SearchCancelled:
+        raise
+    except requests.RequestException as e:
+        raise Exception(f"Erro de rede: {str(e)}")
+    except Exception as e:
+        raise Exception(f"Erro na busca web: {str(e)}")
+
+# Padrão dos arquivos de um desenho: código, página opcional e revisão opcional
+def build_file_pattern(drawing_code):
+    return re.compile(
+        rf"^{re.escape(drawing_code)}(?:-\d+)?(?:-[A-Z])?\.tif$", re.IGNORECASE
+    )
+
+# Percorre apenas as pastas cujo nome segue o prefixo do código (ex: 180 -> 180-570),
+# da mesma forma que a navegação na web; dentro da pasta do segundo nível desce em tudo.
+# Nível 0 é a raiz, 1 a pasta do primeiro segmento e 2 a do segundo (ou abaixo dela).
+def walk_prefix_dirs(base_path, parts, cancel_event=None):
+    first_level_pattern = re.compile(rf"^{re.escape(parts[0])}\b", re.IGNORECASE)
+    second_level_pattern = re.compile(rf"^{re.escape(parts[0])}-{re.escape(parts[1])}\b", re.IGNORECASE)
+    pending = [(base_path, 0)]
+    while pending:
+        check_cancelled(cancel_event)
+        directory, level = pending.pop()
+        files = []
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if not entry.is_dir(follow_symlinks=False):
+                        files.append(entry.name)
+                    elif level == 2 or second_level_pattern.match(entry.name):
+                        pending.append((entry.path, 2))
+                    elif level == 0 and first_level_pattern.match(entry.name):
+                        pending.append((entry.path, 1))
+        except OSError as e:
+            if directory == base_path:
+                raise
+            logger.warning(f"Falha ao listar {directory}: {str(e)}")
+            continue
+        yield directory, files
+
+def get_latest_drawing_paths(base_path, drawing_code, format_code_func, prune=True, full_scan=True, cancel_event=None):
+    drawing_code = format_code_func(drawing_code)
+    parts = drawing_code.split('-')
+    if len(parts) < 2:
+        raise ValueError("Formato inválido. Use: 'xxx-xxx' ou 'xxx-xxx-xxx'")
+
+    if not os.path.exists(base_path):
+        raise Exception(f"Caminho não acessível: {base_path}")
+
+    file_pattern = build_file_pattern(drawing_code)
+
+    found_files = []
+    searched_dirs = []
+
+    try:
+        if prune:
+            for root, files in walk_prefix_dirs(base_path, parts, cancel_event):
+                searched_dirs.append(root)
+                for file in files:
+                    if file_pattern.fullmatch(file):
+                        found_files.append(os.path.join(root, file))
+            if not found_files and full_scan:
+                logger.info(f"Busca por prefixo sem resultados em {len(searched_dirs)} diretórios, "
+                            f"usando varredura completa")
+
+        if not found_files and (full_scan or not prune):
+            for root, dirs, files in os.walk(base_path):
+                check_cancelled(cancel_event)
+                searched_dirs.append(root)
+                for file in files:
+                    if file_pattern.fullmatch(file):
+                        found_files.append(os.path.join(root, file))
+
+        logger.info(f"Pesquisados {len(searched_dirs)} diretórios para padrão: {file_pattern.pattern}")
+        logger.info(f"Encontrados {len(found_files)} arquivos correspondentes")
+
+    except SearchCancelled:
+        raise
+    except PermissionError as e:
+        raise Exception(f"Permissão negada para acessar: {base_path} - {str(e)}")
+    except Exception as e:
+        raise Exception(f"Erro ao pesquisar arquivos locais em {base_path}: {str(e)}")
+
+    return found_files
+
+# Normaliza o código para uso como chave (índice e caches)
+def normalize_drawing_code(drawing_code):
+    return drawing_code.strip().upper()
+
+# Separa o nome de um .tif em código, página e letra de revisão
+def parse_drawing_filename(filename):
+    stem, ext = os.path.splitext(filename)
+    if ext.lower() != '.tif':
+        return None
+    parts = stem.split('-')
+    revision = ''
+    if len(parts) > 1 and len(parts[-1]) == 1 and parts[-1].isalpha():
+        revision = parts.pop().upper()
+    page = ''
+    if len(parts) > 3 and parts[-1].isdigit():
+        page = parts.pop()
+    return normalize_drawing_code('-'.join(parts)), page, revision
+
+class DrawingIndex:
+    """Índice SQLite dos .tif de cada raiz, atualizado incrementalmente pelo mtime das pastas"""
+
+    def __init__(self, db_path, max_age=INDEX_MAX_AGE):
+        self.db_path = db_path
+        self.max_age = max_age
+        self._refreshing = {}
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS roots (
+                    root TEXT PRIMARY KEY,
+                    refreshed_at REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS dirs (
+                    path TEXT PRIMARY KEY,
+                    root TEXT NOT NULL,
+                    mtime REAL NOT NULL,
+                    subdirs TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS files (
+                    path TEXT PRIMARY KEY,
+                    root TEXT NOT NULL,
+                    dir TEXT NOT NULL,
+                    name TEXT NOT NULL,
+                    code TEXT NOT NULL,
+                    page TEXT NOT NULL,
+                    revision TEXT NOT NULL,
+                    size INTEGER
+                );
+                CREATE INDEX IF NOT EXISTS idx_files_code ON files (root, code);
+                CREATE INDEX IF NOT EXISTS idx_files_dir ON files (dir);
+                CREATE INDEX IF NOT EXISTS idx_dirs_root ON dirs (root);
+            """)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    def status(self, root):
+        """Retorna a data da última atualização completa da raiz (ou None se nunca indexada)"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT refreshed_at FROM roots WHERE root = ?", (root,)).fetchone()
+        return row[0] if row else None
+
+    def is_fresh(self, root):
+        refreshed_at = self.status(root)
+        return refreshed_at is not None and time.time() - refreshed_at < self.max_age
+
+    def lookup(self, root, drawing_code):
+        """Busca os arquivos do desenho no índice; retorna None se o índice estiver ausente ou desatualizado"""
+        if not self.is_fresh(root):
+            return None
+        code = normalize_drawing_code(drawing_code)
+        file_pattern = build_file_pattern(drawing_code)
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT path, name FROM files WHERE root = ? "
+                "AND (code = ? OR (code >= ? AND code < ?))",
+                (root, code, code + '-', code + '.')
+            ).fetchall()
+        return [path for path, name in rows if file_pattern.fullmatch(name)]
+
+    def file_sizes(self, paths):
+        """Tamanhos já registrados no índice para os caminhos informados"""
+        sizes = {}
+        with self._connect() as conn:
+            for start in range(0, len(paths), 500):
+                batch = paths[start:start + 500]
+                placeholders = ', '.join('?' * len(batch))
+                sizes.update(conn.execute(
+                    f"SELECT path, size FROM files WHERE path IN ({placeholders})", batch
+                ).fetchall())
+        return sizes
+
+    def refresh(self, root):
+        """Atualiza o índice da raiz, relistando apenas as pastas cujo mtime mudou"""
+        if not os.path.exists(root):
+            raise Exception(f"Caminho não acessível: {root}")
+        started = time.time()
+        with self._connect() as conn:
+            known = {
+                path: (mtime, json.loads(subdirs))
+                for path, mtime, subdirs in conn.execute(
+                    "SELECT path, mtime, subdirs FROM dirs WHERE root = ?", (root,)
+                )
+            }
+        seen = set()
+        pending = [root]
+        rescanned = 0
+
+        while pending:
+            directory = pending.pop()
+            previous = known.get(directory)
+            try:
+                mtime = os.stat(directory).st_mtime
+            except FileNotFoundError:
+                continue
+            except OSError as e:
+                # Mantém o que já estava indexado até a pasta voltar a ficar acessível
+                logger.warning(f"Pasta inacessível durante a indexação: {directory} - {str(e)}")
+                if previous:
+                    seen.add(directory)
+                    pending.extend(os.path.join(directory, name) for name in previous[1])
+                continue
+            seen.add(directory)
+
+            if previous and previous[0] == mtime:
+                pending.extend(os.path.join(directory, name) for name in previous[1])
+                continue
+
+            subdirs = []
+            rows = []
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.name)
+                            continue
+                        parsed = parse_drawing_filename(entry.name)
+                        if parsed:
+                            code, page, revision = parsed
+                            rows.append((entry.path, root, directory, entry.name, code, page, revision,
+                                         entry.stat().st_size))
+            except OSError as e:
+                logger.warning(f"Falha ao listar {directory}: {str(e)}")
+                continue
+
+            with self._connect() as conn:
+                conn.execute("DELETE FROM files WHERE dir = ?", (directory,))
+                conn.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+                conn.execute(
+                    "INSERT OR REPLACE INTO dirs VALUES (?, ?, ?, ?)",
+                    (directory, root, mtime, json.dumps(subdirs))
+                )
+            rescanned += 1
+            pending.extend(os.path.join(directory, name) for name in subdirs)
+
+        removed = [path for path in known if path not in seen]
+        with self._connect() as conn:
+            conn.executemany("DELETE FROM files WHERE dir = ?", [(path,) for path in removed])
+            conn.executemany("DELETE FROM dirs WHERE path = ?", [(path,) for path in removed])
+            conn.execute("INSERT OR REPLACE INTO roots VALUES (?, ?)", (root, time.time()))
+
+        logger.info(
+            f"Índice de {root} atualizado em {time.time() - started:.1f}s: "
+            f"{len(seen)} pastas verificadas, {rescanned} relistadas, {len(removed)} removidas"
+        )
+
+    def refresh_in_background(self, root):
+        """Dispara a atualização da raiz em uma thread, se ainda não houver uma em andamento"""
+        with self._lock:
+            thread = self._refreshing.get(root)
+            if thread and thread.is_alive():
+                return
+            thread = threading.Thread(target=self._safe_refresh, args=(root,), daemon=True)
+            self._refreshing[root] = thread
+            thread.start()
+
+    def _safe_refresh(self, root):
+        try:
+            self.refresh(root)
+        except Exception as e:
+            logger.error(f"Erro ao atualizar o índice de {root}: {str(e)}")
+
+@process_resource
+def get_drawing_index():
+    return DrawingIndex(INDEX_DB_PATH)
+
+# Busca pelo índice; cai para a varredura da pasta quando o índice está ausente ou desatualizado
+# e confere as pastas do prefixo quando o índice em dia não tem o desenho
+def find_drawing_paths(base_path, drawing_code, format_code_func, cancel_event=None):
+    formatted_code = format_code_func(drawing_code)
+    try:
+        index = get_drawing_index()
+        files = index.lookup(base_path, formatted_code)
+    except (sqlite3.Error, OSError) as e:
+        logger.warning(f"Índice indisponível ({str(e)}), usando varredura completa")
+        index, files = None, None
+
+    if files:
+        logger.info(f"Índice: {len(files)} arquivos para {formatted_code} em {base_path}")
+        return files
+
+    if files is not None:
+        # Índice em dia mas sem o desenho: ele pode ter entrado na rede depois da última
+        # atualização. Confere só as pastas do prefixo e, se estiver lá, atualiza o índice
+        try:
+            files = get_latest_drawing_paths(base_path, drawing_code, format_code_func, full_scan=False,
+                                             cancel_event=cancel_event)
+        except SearchCancelled:
+            raise
+        except Exception as e:
+            logger.warning(f"Conferência por prefixo falhou ({str(e)}), usando o resultado do índice")
+            return []
+        logger.info(f"Índice sem {formatted_code} em {base_path}; busca por prefixo achou {len(files)} arquivos")
+        if files:
+            index.refresh_in_background(base_path)
+        return files
+
+    if index and os.path.exists(base_path):
+        index.refresh_in_background(base_path)
+    return get_latest_drawing_paths(base_path, drawing_code, format_code_func, cancel_event=cancel_event)
+
+def group_files_by_version_and_page(files):
+    grouped_files = {}
+    for file in files:
+        filename = os.path.basename(file)
+        match = re.search(r'-(\d+)?-?([A-Z])?\.', filename)
+        page = match.group(1) if match and match.group(1) else 'single'
+        version = match.group(2) if match and match.group(2) else ''
+        if version not in grouped_files:
+            grouped_files[version] = {}
+        if page not in grouped_files[version]:
+            grouped_files[version][page] = []
+        grouped_files[version][page].append(file)
+    return grouped_files
+
+class ZipChunkSink(RawIOBase):
+    """Destino não posicionável para o zipfile: acumula os bytes escritos até serem consumidos"""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self):
+        chunks, self._chunks = self._chunks, []
+        return chunks
+
+# Gera o ZIP em pedaços conforme as entradas são lidas; cada entrada é (nome, iterável de bytes).
+# Os TIFFs já são comprimidos, então vão com ZIP_STORED e a memória fica limitada a um pedaço.
+def iter_zip_chunks(entries):
+    import zipfile
+
+    sink = ZipChunkSink()
+    with zipfile.ZipFile(sink, 'w', zipfile.ZIP_STORED) as zip_file:
+        for name, chunks in entries:
+            with zip_file.open(name, 'w') as entry:
+                for chunk in chunks:
+                    entry.write(chunk)
+                    yield from sink.drain()
+            yield from sink.drain()
+    yield from sink.drain()
+
+# Lê um arquivo em pedaços
+def iter_stream_chunks(file, chunk_size=ZIP_CHUNK_SIZE):
+    while chunk := file.read(chunk_size):
+        yield chunk
+
+def iter_file_chunks(file_path, chunk_size=ZIP_CHUNK_SIZE):
+    with open(file_path, 'rb') as file:
+        yield from iter_stream_chunks(file, chunk_size)
+
+# Baixa uma URL para um arquivo temporário, com novas tentativas e espera crescente
+# para falhas de rede e erros 5xx (erros 4xx não são repetidos)
+def download_to_tempfile(url, retries=DOWNLOAD_RETRIES, backoff=DOWNLOAD_BACKOFF):
+    import requests
+
+    session = get_http_session()
+    for attempt in range(1, retries + 1):
+        file = tempfile.TemporaryFile()
+        try:
+            with session.get(url, timeout=30, stream=True) as response:
+                response.raise_for_status()
+                for chunk in response.iter_content(ZIP_CHUNK_SIZE):
+                    file.write(chunk)
+            file.seek(0)
+            return file
+        except requests.RequestException as e:
+            file.close()
+            status = e.response.status_code if getattr(e, 'response', None) is not None else None
+            if attempt == retries or (status is not None and status < 500):
+                raise
+            logger.warning(f"Tentativa {attempt} de baixar {url} falhou ({str(e)}), tentando novamente")
+            time.sleep(backoff * 2 ** (attempt - 1))
+
+# Entradas de ZIP para arquivos locais (os que sumiram da rede são ignorados)
+def file_zip_entries(files, folder=''):
+    for file_path in files:
+        if os.path.exists(file_path):
+            yield folder + os.path.basename(file_path), iter_file_chunks(file_path)
+
+# Entradas de ZIP baixadas em paralelo (até DOWNLOAD_WORKERS páginas por vez), entregues
+# na ordem das URLs assim que cada uma fica pronta; falhas são registradas e puladas.
+# progress_callback(concluídas, total) é chamado na thread de quem consome as entradas.
+def url_zip_entries(urls, folder='', progress_callback=None, poll_interval=0.2):
+    import requests
+
+    executor = ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS, thread_name_prefix="download")
+    futures = [executor.submit(download_to_tempfile, url) for url in urls]
+    try:
+        for url, future in zip(urls, futures):
+            while not wait([future], timeout=poll_interval).done:
+                if progress_callback:
+                    progress_callback(sum(f.done() for f in futures), len(futures))
+            # Antes de olhar o resultado: uma página que falhou também conta como concluída
+            if progress_callback:
+                progress_callback(sum(f.done() for f in futures), len(futures))
+            try:
+                file = future.result()
+            except requests.RequestException as e:
+                logger.warning(f"Falha ao baixar {url}: {str(e)}")
+                continue
+            with file:
+                yield folder + url.split('/')[-1], iter_stream_chunks(file)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+        for future in futures:
+            if future.done() and not future.cancelled() and not future.exception():
+                future.result().close()
+
+class TemporaryZipFile(FileIO):
+    """Arquivo temporário sem buffer que se apaga ao ser fechado.
+
+    No Windows o tempfile.TemporaryFile devolve um _TemporaryFileWrapper, que o
+    st.download_button recusa; um io.FileIO é aceito em qualquer plataforma.
+    """
+
+    def __init__(self):
+        fd, self.path = tempfile.mkstemp(suffix='.zip')
+        super().__init__(fd, 'w+b')
+
+    def close(self):
+        try:
+            super().close()
+        finally:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+
+# Monta o ZIP em um arquivo temporário em disco, mantendo na memória apenas o pedaço em processamento
+def build_zip(entries):
+    output = TemporaryZipFile()
+    try:
+        for chunk in iter_zip_chunks(entries):
+            output.write(chunk)
+    except BaseException:
+        output.close()
+        raise
+    output.seek(0)
+    return output
+
+def create_zip(files):
+    try:
+        return build_zip(file_zip_entries(files))
+    except Exception as e:
+        raise Exception(f"Erro ao criar arquivo ZIP: {str(e)}")
+
+def create_zip_from_urls(urls, progress_callback=None):
+    try:
+        return build_zip(url_zip_entries(urls, progress_callback=progress_callback))
+    except Exception as e:
+        raise Exception(f"Erro ao criar ZIP a partir de URLs: {str(e)}")
+
+class ResultCache:
+    """Cache LRU com TTL dos resultados por (código normalizado, fonte), opcionalmente salvo em JSON"""
+
+    def __init__(self, path=None, max_entries=RESULT_CACHE_SIZE, ttl=RESULT_CACHE_TTL):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._load()
+
+    @staticmethod
+    def _key(drawing_code, source_name):
+        return f"{source_name}|{normalize_drawing_code(drawing_code)}"
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                stored = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Cache de resultados ignorado ({self.path}): {str(e)}")
+            return
+        now = time.time()
+        for key, entry in sorted(stored.items(), key=lambda item: item[1]["stored_at"]):
+            if now - entry["stored_at"] < self.ttl:
+                self._entries[key] = entry
+
+    def _save(self):
+        if not self.path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            temp_path = self.path + '.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(dict(self._entries), f)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Falha ao salvar o cache de resultados: {str(e)}")
+
+    def get(self, drawing_code, source_name):
+        key = self._key(drawing_code, source_name)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.time() - entry["stored_at"] >= self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry["result"]
+
+    def put(self, drawing_code, source_name, result):
+        key = self._key(drawing_code, source_name)
+        with self._lock:
+            self._entries[key] = {"result": result, "stored_at": time.time()}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._save()
+
+    def invalidate(self, drawing_code=None):
+        """Remove os resultados de um código (todas as fontes) ou, sem código, o cache inteiro"""
+        with self._lock:
+            if drawing_code is None:
+                self._entries.clear()
+            else:
+                suffix = '|' + normalize_drawing_code(drawing_code)
+                for key in [key for key in self._entries if key.endswith(suffix)]:
+                    del self._entries[key]
+            self._save()
+
+    def __len__(self):
+        return len(self._entries)
+
+@process_resource
+def get_result_cache():
+    return ResultCache(RESULT_CACHE_PATH)
+
+# Executa a busca de uma fonte passando antes pelo cache de resultados; só acertos são guardados
+def run_source_cached(source, drawing_code, cancel_event=None):
+    cache = get_result_cache()
+    cached = cache.get(drawing_code, source["name"])
+    if cached is not None:
+        logger.info(f"{source['name']}: resultado de {drawing_code} vindo do cache")
+        return cached
+    result = source["search"](drawing_code, cancel_event)
+    if result:
+        cache.put(drawing_code, source["name"], result)
+    return result
+
+# Fontes de busca, na ordem de exibição. Um acerto em fonte autoritativa (rede local)
+# interrompe as demais fontes autoritativas ainda em execução; a web sempre vai até o fim.
+def search_web(drawing_code, cancel_event=None):
+    return get_latest_drawing_urls(WEB_BASE_URL, drawing_code, cancel_event)
+
+def search_desativados(drawing_code, cancel_event=None):
+    return find_drawing_paths(DESATIVADOS_PATH, drawing_code, format_drawing_code_desativados, cancel_event)
+
+def search_fmc(drawing_code, cancel_event=None):
+    return find_drawing_paths(FMC_PATH, drawing_code, format_drawing_code_fmc, cancel_event)
+
+SEARCH_SOURCES = [
+    {"name": "Web", "search": search_web, "authoritative": False},
+    {"name": "Desativados", "search": search_desativados, "authoritative": True},
+    {"name": "FMC", "search": search_fmc, "authoritative": True},
+]
+
+# Consulta todas as fontes ao mesmo tempo e devolve (fonte, resultado, erro) conforme cada uma termina.
+# on_wait é chamado periodicamente enquanto há fontes pendentes; se ele levantar exceção
+# (ex: o Streamlit interrompendo o script) as buscas restantes são canceladas.
+def search_all_sources(drawing_code, cancel_event=None, on_wait=None, poll_interval=0.25):
+    cancel_event = cancel_event or threading.Event()
+    source_events = {source["name"]: threading.Event() for source in SEARCH_SOURCES}
+    executor = ThreadPoolExecutor(max_workers=len(SEARCH_SOURCES), thread_name_prefix="busca")
+    futures = {
+        executor.submit(run_source_cached, source, drawing_code, source_events[source["name"]]): source
+        for source in SEARCH_SOURCES
+    }
+    pending = set(futures)
+    authoritative_hit = None
+    try:
+        while pending:
+            done, pending = wait(pending, timeout=poll_interval, return_when=FIRST_COMPLETED)
+            if cancel_event.is_set():
+                for event in source_events.values():
+                    event.set()
+            for future in sorted(done, key=lambda f: SEARCH_SOURCES.index(futures[f])):
+                source = futures[future]
+                try:
+                    result, error = future.result(), None
+                except Exception as e:
+                    result, error = None, e
+                if source["authoritative"] and result and not error:
+                    if authoritative_hit:
+                        error = SearchCancelled(f"Desenho já encontrado em {authoritative_hit}")
+                        result = None
+                    else:
+                        authoritative_hit = source["name"]
+                        for other in SEARCH_SOURCES:
+                            if other["authoritative"] and other is not source:
+                                source_events[other["name"]].set()
+                yield source, result, error
+            if pending and on_wait:
+                on_wait([futures[future]["name"] for future in pending])
+    finally:
+        for event in source_events.values():
+            event.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+# Extrai os códigos de desenho (xxx-xxx-xxx) de um texto colado ou arquivo, sem repetir
+def parse_code_list(text):
+    codes = re.findall(r"(?<![\w-])\d+-\d+-\d+(?![\w-])", text)
+    return list(dict.fromkeys(codes))
+
+# Lê os códigos de um CSV/TXT ou XLSX enviado pelo usuário
+def read_codes_from_upload(name, content):
+    if name.lower().endswith('.xlsx'):
+        try:
+            from openpyxl import load_workbook
+        except ImportError:
+            raise Exception("Leitura de .xlsx requer o pacote openpyxl (pip install openpyxl)")
+        workbook = load_workbook(BytesIO(content), read_only=True, data_only=True)
+        cells = (
+            str(value)
+            for sheet in workbook.worksheets
+            for row in sheet.iter_rows(values_only=True)
+            for value in row if value is not None
+        )
+        text = '\n'.join(cells)
+        workbook.close()
+    else:
+        text = content.decode('utf-8-sig', errors='replace')
+    return parse_code_list(text)
+
+# Resolve um código em todas as fontes e devolve uma linha por fonte com resultado
+def resolve_drawing_code(drawing_code, cancel_event=None):
+    rows = []
+    errors = []
+    for source, result, error in search_all_sources(drawing_code, cancel_event):
+        if error or not result:
+            if error and not isinstance(error, SearchCancelled):
+                errors.append(f"{source['name']}: {error}")
+            continue
+        if source["name"] == "Web":
+            urls, revision = result
+            rows.append({"Código": drawing_code, "Fonte": "Web", "Revisão": revision,
+                         "Páginas": len(urls), "Arquivos": urls})
+        else:
+            grouped = group_files_by_version_and_page(result)
+            latest = sorted(grouped.keys(), reverse=True)[0]
+            files = sorted(path for group in grouped[latest].values() for path in group)
+            rows.append({"Código": drawing_code, "Fonte": source["name"], "Revisão": latest,
+                         "Páginas": len(grouped[latest]), "Arquivos": files})
+    source_order = [source["name"] for source in SEARCH_SOURCES]
+    rows.sort(key=lambda row: source_order.index(row["Fonte"]))
+    if not rows:
+        rows.append({"Código": drawing_code, "Fonte": "—", "Revisão": "", "Páginas": 0, "Arquivos": [],
+                     "Observação": "; ".join(errors) or "Não encontrado"})
+    return rows
+
+# Resolve vários códigos em paralelo; as listagens da web e o índice da rede local são
+# compartilhados entre eles. Devolve (código, linhas) conforme cada código termina.
+def resolve_drawing_codes(codes, cancel_event=None, on_wait=None, poll_interval=0.25):
+    cancel_event = cancel_event or threading.Event()
+    executor = ThreadPoolExecutor(max_workers=BATCH_WORKERS, thread_name_prefix="lote")
+    futures = {executor.submit(resolve_drawing_code, code, cancel_event): code for code in codes}
+    pending = set(futures)
+    try:
+        while pending:
+            done, pending = wait(pending, timeout=poll_interval, return_when=FIRST_COMPLETED)
+            for future in done:
+                code = futures[future]
+                try:
+                    rows = future.result()
+                except Exception as e:
+                    rows = [{"Código": code, "Fonte": "—", "Revisão": "", "Páginas": 0, "Arquivos": [],
+                             "Observação": str(e)}]
+                yield code, rows
+            if pending and on_wait:
+                on_wait(len(futures) - len(pending), len(futures))
+    finally:
+        cancel_event.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+# ZIP único com os arquivos de todos os códigos resolvidos, um diretório por código
+def batch_zip_entries(rows):
+    for row in rows:
+        if row["Fonte"] == "Web":
+            yield from url_zip_entries(row["Arquivos"], f"{row['Código']}/web/")
+        else:
+            yield from file_zip_entries(row["Arquivos"], f"{row['Código']}/{row['Fonte']}/")
+
+def create_batch_zip(rows):
+    try:
+        return build_zip(batch_zip_entries(rows))
+    except Exception as e:
+        raise Exception(f"Erro ao criar ZIP do lote: {str(e)}")
+
+# Tamanho dos arquivos locais: usa o índice e só consulta a rede para o que não estiver nele
+def local_file_sizes(paths):
+    try:
+        sizes = get_drawing_index().file_sizes(paths)
+    except (sqlite3.Error, OSError):
+        sizes = {}
+    for path in paths:
+        if sizes.get(path) is None:
+            try:
+                sizes[path] = os.path.getsize(path)
+            except OSError:
+                sizes[path] = None
+    return sizes
+
+# Metadados exibidos para cada arquivo do resultado (nome, tamanho, página, revisão)
+def describe_files(locations, sizes=None):
+    described = []
+    for location in sorted(locations):
+        name = location.split('/')[-1] if location.startswith(('http://', 'https://')) else os.path.basename(location)
+        code, page, revision = parse_drawing_filename(name) or (None, '', '')
+        described.append({
+            "name": name,
+            "location": location,
+            "size": (sizes or {}).get(location),
+            "page": page or "única",
+            "revision": revision,
+        })
+    return described
+
+def format_size(size):
+    if size is None:
+        return "—"
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+def read_file_bytes(file_path):
+    with open(file_path, "rb") as file:
+        return file.read()
+
+# Converte o que uma fonte devolveu no resultado guardado na sessão e exibido na tela;
+# a leitura de tamanhos acontece aqui, uma única vez por busca
+def build_search_outcome(source, result, error):
+    outcome = {"source": source["name"], "files": [], "revision": ""}
+    if isinstance(error, SearchCancelled):
+        outcome.update(status="cancelled", message=str(error))
+    elif error:
+        outcome.update(status="error", message=str(error))
+    elif not result:
+        outcome.update(status="empty", message="nenhum arquivo encontrado")
+    elif source["name"] == "Web":
+        urls, latest_revision = result
+        outcome.update(status="found", revision=latest_revision, files=describe_files(urls))
+    else:
+        grouped = group_files_by_version_and_page(result)
+        latest = sorted(grouped.keys(), reverse=True)[0]
+        files = [path for group in grouped[latest].values() for path in group]
+        outcome.update(status="found", revision=latest, files=describe_files(files, local_file_sizes(files)))
+    return outcome
@@ -0,0 +1,120 @@
+"""
+Cache persistente de resultados de OCR.
+
+Guarda o texto e as caixas das palavras reconhecidas pelo Tesseract, indexados pelo
+hash do conteúdo da imagem (ou da página do PDF) junto com as configurações usadas no
+OCR (idioma, psm, whitelist, DPI...). Assim uma imagem já lida não passa de novo pelo
+Tesseract, mesmo depois de fechar o programa.
+
+Usado pelo Leitor de Cards do GD e pelo OCR Test.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = os.environ.get(
+    "GOMINHO_OCR_CACHE",
+    os.path.join(os.path.expanduser("~"), ".gominho_office", "ocr_cache.sqlite3")
+)
+DEFAULT_MAX_ENTRIES = 20000
+
+
+def content_hash(data: bytes) -> str:
+    """Hash do conteúdo de uma imagem ou documento em memória"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def file_hash(file_path: str, chunk_size: int = 1024 * 1024) -> str:
+    """Hash do conteúdo de um arquivo, lido em pedaços"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        while chunk := file.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class OCRCache:
+    """Cache SQLite de texto e caixas de palavras, com descarte dos itens menos usados"""
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS ocr_results (
+                    key TEXT PRIMARY KEY,
+                    text TEXT NOT NULL,
+                    words TEXT,
+                    created_at REAL NOT NULL,
+                    last_used REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_ocr_last_used ON ocr_results (last_used)")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    @staticmethod
+    def make_key(content_digest: str, settings: Dict) -> str:
+        """Chave do cache: hash do conteúdo + configurações do OCR que alteram o resultado"""
+        settings_json = json.dumps(settings, sort_keys=True)
+        return hashlib.sha256(f"{content_digest}|{settings_json}".encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Retorna {"text": ..., "words": [...]} ou None se a chave não estiver no cache"""
+        try:
+            with self._connect() as conn:
+                row = conn.execute("SELECT text, words FROM ocr_results WHERE key = ?", (key,)).fetchone()
+                if row:
+                    conn.execute("UPDATE ocr_results SET last_used = ? WHERE key = ?", (time.time(), key))
+        except sqlite3.Error as e:
+            logger.warning(f"Cache de OCR indisponível: {e}")
+            return None
+        if not row:
+            return None
+        return {"text": row[0], "words": json.loads(row[1]) if row[1] else None}
+
+    def put(self, key: str, text: str, words: Optional[List] = None):
+        """Guarda o texto e, se houver, as palavras como [texto, esquerda, topo, largura, altura, confiança]"""
+        now = time.time()
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO ocr_results VALUES (?, ?, ?, ?, ?)",
+                    (key, text, json.dumps(words) if words is not None else None, now, now)
+                )
+                self._evict(conn)
+        except sqlite3.Error as e:
+            logger.warning(f"Falha ao gravar no cache de OCR: {e}")
+
+    def _evict(self, conn: sqlite3.Connection):
+        """Remove os itens usados há mais tempo quando o cache passa do limite (com folga de 10%)"""
+        count = conn.execute("SELECT COUNT(*) FROM ocr_results").fetchone()[0]
+        if count <= self.max_entries * 1.1:
+            return
+        conn.execute(
+            "DELETE FROM ocr_results WHERE key IN "
+            "(SELECT key FROM ocr_results ORDER BY last_used LIMIT ?)",
+            (count - self.max_entries,)
+        )
+
+    def clear(self):
+        """Esvazia o cache"""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM ocr_results")
@@ -0,0 +1,163 @@
+"""
+Motores de OCR usados pelo Leitor de Cards do GD e pelo OCR Test.
+
+O pytesseract abre um processo do tesseract e grava arquivos temporários para cada
+imagem, recarregando os traineddata (por+eng) toda vez; em fotos pequenas de cartões
+esse custo de inicialização é maior que o próprio OCR. O motor tesserocr usa a API C
+do Tesseract dentro do processo e mantém o modelo carregado entre as imagens.
+
+get_engine() devolve um motor por thread (a API do Tesseract não é thread-safe),
+criado na primeira chamada e reaproveitado depois: cada processo do pool de OCR
+carrega o modelo uma vez só. Sem o tesserocr instalado cai no pytesseract.
+A variável de ambiente GOMINHO_OCR_ENGINE força um motor ("pytesseract" ou "tesserocr").
+"""
+
+import importlib.util
+import logging
+import os
+import shlex
+import threading
+from typing import List, Optional, Tuple
+
+import pytesseract
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+ENGINE_ENV = "GOMINHO_OCR_ENGINE"
+
+_local = threading.local()
+
+
+def parse_tesseract_config(config: str) -> Tuple[Optional[int], Optional[int], dict]:
+    """Converte a linha de opções do tesseract em (psm, oem, variáveis -c)"""
+    psm = oem = None
+    variables = {}
+    args = shlex.split(config)
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if arg == '--psm' and i + 1 < len(args):
+            psm = int(args[i + 1])
+            i += 1
+        elif arg == '--oem' and i + 1 < len(args):
+            oem = int(args[i + 1])
+            i += 1
+        elif arg == '-c' and i + 1 < len(args):
+            name, _, value = args[i + 1].partition('=')
+            variables[name] = value
+            i += 1
+        else:
+            logger.warning(f"Opção do tesseract ignorada pelo motor tesserocr: {arg}")
+        i += 1
+    return psm, oem, variables
+
+
+def find_tessdata() -> Optional[str]:
+    """Pasta tessdata ao lado do executável configurado no pytesseract, ou a de TESSDATA_PREFIX"""
+    tesseract_dir = os.path.dirname(pytesseract.pytesseract.tesseract_cmd)
+    for candidate in (os.path.join(tesseract_dir, "tessdata") if tesseract_dir else None,
+                      os.environ.get("TESSDATA_PREFIX")):
+        if candidate and os.path.isdir(candidate):
+            return candidate
+    return None
+
+
+class PytesseractEngine:
+    """Um processo do tesseract por imagem (comportamento original)"""
+
+    name = "pytesseract"
+
+    def __init__(self, lang: Optional[str] = None, config: str = ""):
+        self.lang = lang
+        self.config = config
+
+    def image_to_string(self, image: Image.Image, timeout: float = 0) -> str:
+        return pytesseract.image_to_string(image, lang=self.lang, config=self.config, timeout=timeout)
+
+    def image_to_words(self, image: Image.Image, timeout: float = 0) -> List[list]:
+        """Palavras reconhecidas como [texto, esquerda, topo, largura, altura, confiança], em pixels"""
+        data = pytesseract.image_to_data(
+            image, lang=self.lang, config=self.config, timeout=timeout, output_type=pytesseract.Output.DICT
+        )
+        return [
+            [word, data["left"][i], data["top"][i], data["width"][i], data["height"][i], data["conf"][i]]
+            for i, word in enumerate(data["text"]) if word.strip()
+        ]
+
+    def close(self):
+        pass
+
+
+class TesserocrEngine:
+    """API do Tesseract carregada uma vez e reaproveitada (não aceita timeout)"""
+
+    name = "tesserocr"
+
+    def __init__(self, lang: Optional[str] = None, config: str = ""):
+        import tesserocr
+
+        self._tesserocr = tesserocr
+        psm, oem, variables = parse_tesseract_config(config)
+        kwargs = {"lang": lang or "eng"}
+        tessdata = find_tessdata()
+        if tessdata:
+            kwargs["path"] = tessdata
+        if psm is not None:
+            kwargs["psm"] = psm
+        if oem is not None:
+            kwargs["oem"] = oem
+        self.api = tesserocr.PyTessBaseAPI(**kwargs)
+        for name, value in variables.items():
+            self.api.SetVariable(name, value)
+
+    def image_to_string(self, image: Image.Image, timeout: float = 0) -> str:
+        self.api.SetImage(image)
+        return self.api.GetUTF8Text()
+
+    def image_to_words(self, image: Image.Image, timeout: float = 0) -> List[list]:
+        """Palavras reconhecidas como [texto, esquerda, topo, largura, altura, confiança], em pixels"""
+        RIL = self._tesserocr.RIL
+        self.api.SetImage(image)
+        self.api.Recognize()
+        words = []
+        for result in self._tesserocr.iterate_level(self.api.GetIterator(), RIL.WORD):
+            word = result.GetUTF8Text(RIL.WORD)
+            box = result.BoundingBox(RIL.WORD)
+            if not word or not word.strip() or not box:
+                continue
+            x0, y0, x1, y1 = box
+            words.append([word, x0, y0, x1 - x0, y1 - y0, result.Confidence(RIL.WORD)])
+        return words
+
+    def close(self):
+        self.api.End()
+
+
+ENGINES = {engine.name: engine for engine in (TesserocrEngine, PytesseractEngine)}
+
+
+def engine_name() -> str:
+    """Nome do motor que get_engine() vai usar (entra na chave do cache de OCR)"""
+    forced = os.environ.get(ENGINE_ENV, "").strip().lower()
+    if forced in ENGINES:
+        return forced
+    return "tesserocr" if importlib.util.find_spec("tesserocr") else "pytesseract"
+
+
+def get_engine(lang: Optional[str] = None, config: str = ""):
+    """Motor de OCR desta thread para o idioma/configuração, criado na primeira chamada"""
+    engines = getattr(_local, "engines", None)
+    if engines is None:
+        engines = _local.engines = {}
+    key = (lang, config)
+    if key not in engines:
+        name = engine_name()
+        try:
+            engines[key] = ENGINES[name](lang, config)
+        except Exception as e:
+            if name == PytesseractEngine.name:
+                raise
+            logger.warning(f"Motor {name} indisponível ({e}); usando pytesseract")
+            engines[key] = PytesseractEngine(lang, config)
+    return engines[key]
@@ -0,0 +1,173 @@
+"""
+Leitura das páginas de PDF usada pelo OCR Test: camada de texto, renderização e OCR.
+
+Fica fora do script do Gradio porque as páginas digitalizadas são lidas num pool de
+processos: no Windows cada processo do pool importa de novo o módulo da função que
+executa, e importar o gradio (e abrir o cache) em cada um levava segundos por processo.
+Aqui só entram o PyMuPDF, o PIL e o motor de OCR.
+
+As palavras são sempre [texto, x, y, largura, altura, confiança], em pontos do PDF.
+"""
+
+import os
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import fitz  # PyMuPDF
+import pytesseract
+from PIL import Image
+
+from ocr_engine import get_engine
+
+DPI = 100  # Qualidade da renderização do PDF
+# OCR adaptativo: um passo barato em DPI baixo acha os blocos de texto e só eles são
+# renderizados de novo, num DPI escolhido pela altura das linhas, para o Tesseract
+ADAPTIVE_OCR = True
+SCAN_DPI = 50  # DPI do passo que procura as regiões com texto
+INK_THRESHOLD = 160  # Tons de cinza abaixo disso contam como tinta
+BLOCK_GAP = 18  # Linhas separadas por até esses pontos ficam no mesmo bloco
+REGION_MARGIN = 6  # Margem em pontos ao redor de cada bloco
+# Altura, em pixels, da faixa de tinta de uma linha de corpo 10 pt (cerca de 8,6 pt) no
+# DPI fixo: o texto normal continua no DPI de sempre e só a letra miúda ganha resolução
+TARGET_LINE_PX = 12
+MIN_OCR_DPI, MAX_OCR_DPI = DPI, 300
+FULL_PAGE_RATIO = 0.85  # Blocos cobrindo mais que isso da página: OCR da página inteira
+PAGE_WORKERS = max(1, (os.cpu_count() or 2) - 1)  # Processos de OCR das páginas digitalizadas
+
+def render_page(page, dpi=DPI):
+    # Monta a imagem direto dos pixels do pixmap, sem passar por PNG
+    pix = page.get_pixmap(dpi=dpi, alpha=False)
+    return Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+
+def image_words(img, dpi, x0=0, y0=0):
+    """Roda o Tesseract na imagem e retorna [[texto, x, y, largura, altura, confiança], ...] em pontos do PDF
+
+    (x0, y0) é a origem, em pontos, da região da página que a imagem representa.
+    """
+    scale = 72 / dpi
+    return [
+        [word, x0 + left * scale, y0 + top * scale, width * scale, height * scale, conf]
+        for word, left, top, width, height, conf in get_engine().image_to_words(img)
+    ]
+
+def page_pixels(page, dpi):
+    return int(page.rect.width * dpi / 72) * int(page.rect.height * dpi / 72)
+
+def ocr_page_words(page):
+    """OCR da página inteira em DPI fixo; retorna (palavras, estatísticas)"""
+    start = time.perf_counter()
+    words = image_words(render_page(page), DPI)
+    pixels = page_pixels(page, DPI)
+    return words, {"seconds": time.perf_counter() - start, "pixels": pixels, "page_pixels": pixels}
+
+def find_text_blocks(page):
+    """Passo em DPI baixo: retorna [(fitz.Rect, altura mediana das linhas)] dos blocos com tinta, em pontos"""
+    pix = page.get_pixmap(dpi=SCAN_DPI, colorspace=fitz.csGRAY, alpha=False)
+    ink = Image.frombytes("L", (pix.width, pix.height), pix.samples).point(lambda v: 255 if v < INK_THRESHOLD else 0)
+    scale = 72 / SCAN_DPI
+
+    # Reduzir a imagem a uma coluna dá a quantidade de tinta de cada linha de pixels
+    row_ink = list(ink.resize((1, ink.height), Image.BOX).getdata())
+    lines = []
+    for y, value in enumerate(row_ink):
+        if not value:
+            continue
+        if lines and lines[-1][1] == y - 1:
+            lines[-1][1] = y
+        else:
+            lines.append([y, y])
+
+    blocks = []
+    for y0, y1 in lines:
+        bbox = ink.crop((0, y0, ink.width, y1 + 1)).getbbox()
+        if not bbox:
+            continue
+        rect = fitz.Rect(bbox[0] * scale, y0 * scale, bbox[2] * scale, (y1 + 1) * scale)
+        if blocks and rect.y0 - blocks[-1][0].y1 <= BLOCK_GAP:
+            blocks[-1][0] |= rect
+            blocks[-1][1].append(rect.height)
+        else:
+            blocks.append([rect, [rect.height]])
+
+    return [
+        ((rect + (-REGION_MARGIN, -REGION_MARGIN, REGION_MARGIN, REGION_MARGIN)) & page.rect, statistics.median(heights))
+        for rect, heights in blocks
+    ]
+
+def ocr_dpi_for_line_height(line_height):
+    """DPI em que uma linha com essa altura (em pontos) fica com TARGET_LINE_PX pixels"""
+    return max(MIN_OCR_DPI, min(MAX_OCR_DPI, int(TARGET_LINE_PX * 72 / line_height)))
+
+def adaptive_ocr_page_words(page):
+    """OCR só dos blocos com texto, cada um no DPI adequado ao tamanho da letra
+
+    Letra miúda ganha resolução e o corpo de texto fica no DPI fixo; as margens e
+    áreas em branco nem chegam ao Tesseract. Retorna (palavras, estatísticas), com os
+    pixels enviados ao OCR e os da página inteira no DPI fixo, para comparação.
+    """
+    if page.rotation:
+        # Em página girada o clip não bate com as coordenadas do passo em DPI baixo
+        return ocr_page_words(page)
+
+    start = time.perf_counter()
+    blocks = find_text_blocks(page)
+    if not blocks:
+        return [], {"seconds": time.perf_counter() - start, "pixels": 0, "page_pixels": page_pixels(page, DPI)}
+
+    block_area = sum(rect.width * rect.height for rect, _ in blocks)
+    if block_area >= FULL_PAGE_RATIO * page.rect.width * page.rect.height:
+        # Texto na página toda: uma chamada só, no DPI da linha mediana
+        blocks = [(page.rect, statistics.median(height for _, height in blocks))]
+
+    words = []
+    pixels = 0
+    for rect, line_height in blocks:
+        dpi = ocr_dpi_for_line_height(line_height)
+        pix = page.get_pixmap(dpi=dpi, clip=rect, alpha=False)
+        img = Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+        words.extend(image_words(img, dpi, rect.x0, rect.y0))
+        pixels += pix.width * pix.height
+
+    return words, {"seconds": time.perf_counter() - start, "pixels": pixels, "page_pixels": page_pixels(page, DPI)}
+
+def native_page_words(page):
+    """Palavras da camada de texto do PDF, já em pontos; vazio em páginas digitalizadas"""
+    return [
+        [word, x0, y0, x1 - x0, y1 - y0, 100]
+        for x0, y0, x1, y1, word, *_ in page.get_text("words") if word.strip()
+    ]
+
+# Documento aberto por cada processo do pool: páginas do fitz não podem ser
+# compartilhadas entre processos (nem usadas em paralelo em um só documento)
+_worker_doc = None
+
+def _init_page_worker(file_path, tesseract_cmd):
+    global _worker_doc
+    pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
+    # Cada processo já cuida de uma página; sem isso cada Tesseract abre várias threads
+    os.environ["OMP_THREAD_LIMIT"] = "1"
+    _worker_doc = fitz.open(file_path)
+
+def _ocr_page_worker(page_index):
+    page = _worker_doc[page_index]
+    words, stats = adaptive_ocr_page_words(page) if ADAPTIVE_OCR else ocr_page_words(page)
+    return page_index, words, stats
+
+def ocr_pages(file_path, page_indexes):
+    """OCR das páginas num pool de processos; gera (página, palavras, estatísticas) conforme terminam
+
+    Ao fechar o gerador (busca interrompida) as páginas que ainda não começaram são canceladas.
+    """
+    executor = ProcessPoolExecutor(
+        max_workers=min(PAGE_WORKERS, len(page_indexes)),
+        initializer=_init_page_worker,
+        initargs=(file_path, pytesseract.pytesseract.tesseract_cmd)
+    )
+    try:
+        futures = [executor.submit(_ocr_page_worker, page_index) for page_index in page_indexes]
+        for future in as_completed(futures):
+            yield future.result()
+    finally:
+        # Sem esperar: numa busca interrompida as páginas pendentes são descartadas
+        executor.shutdown(wait=False, cancel_futures=True)